@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Ship-to address normalization for the Document Matcher
+Canonical forms (USPS street suffix and unit abbreviations, state codes, 5-digit ZIP) so most
+address comparisons are settled by equality and only real differences are fuzzy-scored
+"""
+
+import re
+import string
+from functools import lru_cache
+from typing import Tuple
+
+# Bump when normalization changes, so stored canonical forms (e.g. in the order index) are rebuilt
+KEY_VERSION = "1"
+
+# ShipToAddress fields, in the order they appear in a canonical key
+FIELDS = ('name', 'address', 'city', 'state', 'zip_code')
+
+# USPS Publication 28 street suffixes (C1) and secondary unit designators (C2)
+STREET_SUFFIXES = {
+    'ALLEY': 'ALY', 'ANNEX': 'ANX', 'ARCADE': 'ARC', 'AVENUE': 'AVE', 'AV': 'AVE', 'BAYOU': 'BYU',
+    'BEACH': 'BCH', 'BEND': 'BND', 'BLUFF': 'BLF', 'BOULEVARD': 'BLVD', 'BOUL': 'BLVD', 'BRANCH': 'BR',
+    'BRIDGE': 'BRG', 'BROOK': 'BRK', 'BYPASS': 'BYP', 'CAUSEWAY': 'CSWY', 'CENTER': 'CTR', 'CENTRE': 'CTR',
+    'CIRCLE': 'CIR', 'CLIFF': 'CLF', 'COMMON': 'CMN', 'CORNER': 'COR', 'COURSE': 'CRSE', 'COURT': 'CT',
+    'COVE': 'CV', 'CREEK': 'CRK', 'CRESCENT': 'CRES', 'CROSSING': 'XING', 'DRIVE': 'DR', 'ESTATE': 'EST',
+    'EXPRESSWAY': 'EXPY', 'EXTENSION': 'EXT', 'FREEWAY': 'FWY', 'GARDEN': 'GDN', 'GARDENS': 'GDNS',
+    'GATEWAY': 'GTWY', 'GROVE': 'GRV', 'HARBOR': 'HBR', 'HEIGHTS': 'HTS', 'HIGHWAY': 'HWY', 'HILL': 'HL',
+    'HOLLOW': 'HOLW', 'ISLAND': 'IS', 'JUNCTION': 'JCT', 'LAKE': 'LK', 'LANDING': 'LNDG', 'LANE': 'LN',
+    'LOOP': 'LOOP', 'MANOR': 'MNR', 'MEADOWS': 'MDWS', 'MOTORWAY': 'MTWY', 'MOUNTAIN': 'MTN', 'PARKWAY': 'PKWY',
+    'PKY': 'PKWY', 'PASSAGE': 'PSGE', 'PIKE': 'PIKE', 'PLACE': 'PL', 'PLAZA': 'PLZ', 'POINT': 'PT',
+    'PORT': 'PRT', 'PRAIRIE': 'PR', 'RIDGE': 'RDG', 'ROAD': 'RD', 'ROUTE': 'RTE', 'SPRING': 'SPG',
+    'SQUARE': 'SQ', 'STATION': 'STA', 'STREET': 'ST', 'STR': 'ST', 'SUMMIT': 'SMT', 'TERRACE': 'TER',
+    'TRACE': 'TRCE', 'TRAIL': 'TRL', 'TURNPIKE': 'TPKE', 'VALLEY': 'VLY', 'VIEW': 'VW', 'VILLAGE': 'VLG',
+    'VISTA': 'VIS', 'WALK': 'WALK', 'WAY': 'WAY',
+}
+UNIT_DESIGNATORS = {
+    'APARTMENT': 'APT', 'BASEMENT': 'BSMT', 'BUILDING': 'BLDG', 'DEPARTMENT': 'DEPT', 'FLOOR': 'FL',
+    'FRONT': 'FRNT', 'HANGAR': 'HNGR', 'LOBBY': 'LBBY', 'LOWER': 'LOWR', 'OFFICE': 'OFC',
+    'PENTHOUSE': 'PH', 'ROOM': 'RM', 'SPACE': 'SPC', 'SUITE': 'STE', 'TRAILER': 'TRLR', 'UPPER': 'UPPR',
+}
+DIRECTIONALS = {
+    'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
+    'NORTHEAST': 'NE', 'NORTHWEST': 'NW', 'SOUTHEAST': 'SE', 'SOUTHWEST': 'SW',
+}
+ADDRESS_WORDS = {**STREET_SUFFIXES, **UNIT_DESIGNATORS, **DIRECTIONALS}
+UNIT_CODES = frozenset(UNIT_DESIGNATORS.values()) | {'APT', 'UNIT', 'LOT', 'PIER', 'SLIP', 'STOP', 'REAR', 'SIDE'}
+CITY_WORDS = {'SAINT': 'ST', 'SAINTE': 'STE', 'FORT': 'FT', 'MOUNT': 'MT', **DIRECTIONALS}
+
+STATE_CODES = {
+    'ALABAMA': 'AL', 'ALASKA': 'AK', 'ARIZONA': 'AZ', 'ARKANSAS': 'AR', 'CALIFORNIA': 'CA', 'COLORADO': 'CO',
+    'CONNECTICUT': 'CT', 'DELAWARE': 'DE', 'DISTRICT OF COLUMBIA': 'DC', 'FLORIDA': 'FL', 'GEORGIA': 'GA',
+    'HAWAII': 'HI', 'IDAHO': 'ID', 'ILLINOIS': 'IL', 'INDIANA': 'IN', 'IOWA': 'IA', 'KANSAS': 'KS',
+    'KENTUCKY': 'KY', 'LOUISIANA': 'LA', 'MAINE': 'ME', 'MARYLAND': 'MD', 'MASSACHUSETTS': 'MA',
+    'MICHIGAN': 'MI', 'MINNESOTA': 'MN', 'MISSISSIPPI': 'MS', 'MISSOURI': 'MO', 'MONTANA': 'MT',
+    'NEBRASKA': 'NE', 'NEVADA': 'NV', 'NEW HAMPSHIRE': 'NH', 'NEW JERSEY': 'NJ', 'NEW MEXICO': 'NM',
+    'NEW YORK': 'NY', 'NORTH CAROLINA': 'NC', 'NORTH DAKOTA': 'ND', 'OHIO': 'OH', 'OKLAHOMA': 'OK',
+    'OREGON': 'OR', 'PENNSYLVANIA': 'PA', 'RHODE ISLAND': 'RI', 'SOUTH CAROLINA': 'SC', 'SOUTH DAKOTA': 'SD',
+    'TENNESSEE': 'TN', 'TEXAS': 'TX', 'UTAH': 'UT', 'VERMONT': 'VT', 'VIRGINIA': 'VA', 'WASHINGTON': 'WA',
+    'WEST VIRGINIA': 'WV', 'WISCONSIN': 'WI', 'WYOMING': 'WY', 'PUERTO RICO': 'PR', 'GUAM': 'GU',
+    'VIRGIN ISLANDS': 'VI', 'AMERICAN SAMOA': 'AS', 'NORTHERN MARIANA ISLANDS': 'MP',
+}
+
+# One str.translate pass: '.' and apostrophes are dropped so "St." is "ST" and "O'Neil" is "ONEIL",
+# '&' reads as AND, '#' becomes a word of its own and other punctuation separates words
+WORD_TABLE = str.maketrans({**{ch: ' ' for ch in string.punctuation + '’‘“”–—'},
+                            '.': None, "'": None, '’': None, '&': ' AND ', '#': ' # '})
+PO_BOX_RE = re.compile(r"\b(?:P O|POST OFFICE) BOX\b")
+ZIP_RE = re.compile(r"\d{5}")
+
+def _words(value: str) -> list:
+    """Upper-cased words of value, with '#' split off as a word of its own"""
+    return value.upper().translate(WORD_TABLE).split()
+
+def _address(value: str) -> str:
+    words = [ADDRESS_WORDS.get(word, word) for word in _words(value)]
+    if '#' in words:
+        # "Suite #4" and "Ste 4" are the same unit; a '#' with no designator stays
+        words = [word for n, word in enumerate(words) if word != '#' or not n or words[n - 1] not in UNIT_CODES]
+    address = ' '.join(words)
+    return PO_BOX_RE.sub('PO BOX', address) if 'BOX' in address else address
+
+def _city(value: str) -> str:
+    return ' '.join(CITY_WORDS.get(word, word) for word in _words(value))
+
+def _state(value: str) -> str:
+    state = ' '.join(_words(value))
+    return STATE_CODES.get(state, state)
+
+def _zip_code(value: str) -> str:
+    # ZIP+4 and a bare 9-digit ZIP compare on the 5-digit ZIP
+    match = ZIP_RE.match(value.strip())
+    return match.group() if match else value.strip()
+
+def _name(value: str) -> str:
+    return ' '.join(_words(value))
+
+NORMALIZERS = {
+    'name': _name,
+    'address': _address,
+    'city': _city,
+    'state': _state,
+    'zip_code': _zip_code,
+}
+
+@lru_cache(maxsize=65536)
+def normalize(field: str, value: str) -> str:
+    """Canonical form of one address field, e.g. normalize('address', '123 Main Street Suite 4') == '123 MAIN ST STE 4'
+
+    Results are memoized: a customer's address recurs on every order.
+    """
+    return NORMALIZERS[field](value)
+
+@lru_cache(maxsize=4096)
+def canonical_key(address) -> Tuple[str, ...]:
+    """Normalized (name, address, city, state, zip_code) of a ShipToAddress
+
+    Two addresses with the same key match on every field. Keys are memoized per address,
+    so a document's key is worked out once, when it is loaded, however often it is compared.
+    """
+    return (_name(address.name), _address(address.address), _city(address.city),
+            _state(address.state), _zip_code(address.zip_code))
+
+def clear_cache():
+    """Forget memoized forms and keys"""
+    normalize.cache_clear()
+    canonical_key.cache_clear()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Line-item alignment for the Document Matcher
+Pairs SO and PO line items by solving an assignment problem over SKU, description and qty similarity
+"""
+
+import re
+from collections import Counter, defaultdict
+from typing import List, Optional, Sequence, Tuple
+
+_np = False  # not looked for yet; None once found missing
+_solver = False
+
+# Relative weight of each signal in a pair's score (they sum to 1)
+SKU_WEIGHT = 0.5
+DESC_WEIGHT = 0.35
+QTY_WEIGHT = 0.15
+# Pairs scoring below this are left unmatched rather than forced together
+MIN_SCORE = 0.45
+
+WORD_RE = re.compile(r"\w+")
+
+def _numpy():
+    """NumPy, imported on the first alignment rather than at startup; None when not installed"""
+    global _np
+    if _np is False:
+        try:
+            import numpy
+        except ImportError:  # scoring falls back to a sparse pure-Python path
+            numpy = None
+        _np = numpy
+    return _np
+
+def _linear_sum_assignment():
+    """SciPy's assignment solver, imported on the first assignment; None when not installed"""
+    global _solver
+    if _solver is False:
+        try:
+            from scipy.optimize import linear_sum_assignment
+        except ImportError:  # the pure-Python Hungarian method below is used instead
+            linear_sum_assignment = None
+        _solver = linear_sum_assignment
+    return _solver
+
+def preload():
+    """Import NumPy and SciPy now rather than on the first alignment, for long-lived worker processes"""
+    _numpy()
+    _linear_sum_assignment()
+
+def _sku_grams(sku: str) -> Counter:
+    """Character bigrams of a padded, lower-cased SKU"""
+    padded = f"^{sku.lower()}$"
+    return Counter(padded[k:k+2] for k in range(len(padded) - 1))
+
+def _desc_tokens(description: str) -> Counter:
+    return Counter(WORD_RE.findall(description.lower()))
+
+def _cosine_matrix(left: List[Counter], right: List[Counter]):
+    """Cosine similarity of every left bag against every right bag
+
+    With NumPy this is one matrix product over dense count vectors; without it, an
+    inverted index over the right bags so only pairs sharing a token are visited.
+    """
+    np = _numpy()
+    if np is not None:
+        vocab = {}
+        for bag in left + right:
+            for token in bag:
+                vocab.setdefault(token, len(vocab))
+        a = np.zeros((len(left), max(len(vocab), 1)))
+        b = np.zeros((len(right), max(len(vocab), 1)))
+        for matrix, bags in ((a, left), (b, right)):
+            for row, bag in enumerate(bags):
+                for token, count in bag.items():
+                    matrix[row, vocab[token]] = count
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix /= norms
+        return a @ b.T
+    index = defaultdict(list)
+    right_norms = []
+    for j, bag in enumerate(right):
+        right_norms.append(sum(c * c for c in bag.values()) ** 0.5 or 1.0)
+        for token, count in bag.items():
+            index[token].append((j, count))
+    result = []
+    for bag in left:
+        row = [0.0] * len(right)
+        norm = sum(c * c for c in bag.values()) ** 0.5 or 1.0
+        for token, count in bag.items():
+            for j, other in index.get(token, ()):
+                row[j] += count * other
+        result.append([row[j] / (norm * right_norms[j]) for j in range(len(right))])
+    return result
+
+def score_matrix(so_items: Sequence, po_items: Sequence):
+    """Similarity in [0, 1] of every SO item (rows) against every PO item (columns)
+
+    Items only need sku, description and qty attributes. Returns a NumPy array when
+    NumPy is installed, otherwise a list of lists.
+    """
+    sku = _cosine_matrix([_sku_grams(i.sku) for i in so_items], [_sku_grams(i.sku) for i in po_items])
+    desc = _cosine_matrix([_desc_tokens(i.description) for i in so_items],
+                          [_desc_tokens(i.description) for i in po_items])
+    np = _numpy()
+    if np is not None:
+        so_skus = np.array([i.sku.lower() for i in so_items], dtype=object)
+        po_skus = np.array([i.sku.lower() for i in po_items], dtype=object)
+        # An exact SKU match outranks any near miss
+        sku = np.where(so_skus[:, None] == po_skus[None, :], 1.0, sku * 0.9)
+        so_qty = np.array([i.qty for i in so_items])
+        po_qty = np.array([i.qty for i in po_items])
+        qty = (so_qty[:, None] == po_qty[None, :]) & (so_qty[:, None] != 0)
+        return SKU_WEIGHT * sku + DESC_WEIGHT * desc + QTY_WEIGHT * qty
+    scores = []
+    for r, so in enumerate(so_items):
+        so_sku = so.sku.lower()
+        row = []
+        for c, po in enumerate(po_items):
+            sku_score = 1.0 if so_sku == po.sku.lower() else sku[r][c] * 0.9
+            qty_score = 1.0 if so.qty == po.qty and so.qty != 0 else 0.0
+            row.append(SKU_WEIGHT * sku_score + DESC_WEIGHT * desc[r][c] + QTY_WEIGHT * qty_score)
+        scores.append(row)
+    return scores
+
+def _hungarian(cost: List[List[float]]) -> List[Tuple[int, int]]:
+    """Minimum-cost assignment for a rows <= columns cost matrix (shortest augmenting paths with potentials)"""
+    n, m = len(cost), len(cost[0])
+    inf = float('inf')
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    p = [0] * (m + 1)    # p[j]: row (1-based) assigned to column j
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            row = cost[i0 - 1]
+            ui0 = u[i0]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - ui0 - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    return [(p[j] - 1, j - 1) for j in range(1, m + 1) if p[j]]
+
+def assign(scores) -> List[Tuple[int, int]]:
+    """Row/column pairs maximising the total score; uses SciPy's solver when it is installed"""
+    rows = len(scores)
+    cols = len(scores[0]) if rows else 0
+    if not rows or not cols:
+        return []
+    np = _numpy()
+    linear_sum_assignment = _linear_sum_assignment()
+    if linear_sum_assignment is not None and np is not None:
+        row_idx, col_idx = linear_sum_assignment(np.asarray(scores), maximize=True)
+        return list(zip(row_idx.tolist(), col_idx.tolist()))
+    cost = [[-float(s) for s in row] for row in (scores.tolist() if np is not None else scores)]
+    if rows <= cols:
+        return _hungarian(cost)
+    transposed = [list(col) for col in zip(*cost)]
+    return [(r, c) for c, r in _hungarian(transposed)]
+
+def align_items(so_items: Sequence, po_items: Sequence,
+                min_score: float = MIN_SCORE) -> List[Tuple[Optional[int], Optional[int]]]:
+    """Pair SO and PO items, returning (so_index, po_index) rows with None for an unmatched side
+
+    SKUs that appear exactly once on each side are paired directly, which keeps ordinary
+    orders on the exact-SKU result and leaves only the leftovers (near-miss or duplicate
+    SKUs) for the assignment solver. Rows come back in SO order, then unmatched PO items
+    in PO order.
+    """
+    so_counts = Counter(item.sku for item in so_items)
+    po_counts = Counter(item.sku for item in po_items)
+    po_by_sku = {item.sku: j for j, item in enumerate(po_items)}
+    match = {}
+    for i, item in enumerate(so_items):
+        if item.sku and so_counts[item.sku] == 1 and po_counts[item.sku] == 1:
+            match[i] = po_by_sku[item.sku]
+
+    rest_so = [i for i in range(len(so_items)) if i not in match]
+    taken = set(match.values())
+    rest_po = [j for j in range(len(po_items)) if j not in taken]
+    if rest_so and rest_po:
+        scores = score_matrix([so_items[i] for i in rest_so], [po_items[j] for j in rest_po])
+        for r, c in assign(scores):
+            if scores[r][c] >= min_score:
+                match[rest_so[r]] = rest_po[c]
+
+    rows = [(i, match.get(i)) for i in range(len(so_items))]
+    matched_po = set(match.values())
+    rows.extend((None, j) for j in range(len(po_items)) if j not in matched_po)
+    return rows
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+SKU catalog for the Document Matcher
+Valid SKUs and their descriptions in a sorted array, so parsed SKUs are checked by binary search
+and near misses (another size of the style, a mistyped or transposed character) are found by
+looking up the few hundred strings one edit away instead of scoring the whole catalog
+"""
+
+import bisect
+import csv
+import io
+import json
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+CATALOG_PATH = Path(__file__).with_name("sku_catalog.csv")
+CATALOG_ENV_VAR = "DOCUMENT_MATCHER_CATALOG"
+# Near-miss SKUs proposed for one unknown SKU
+MAX_SUGGESTIONS = 3
+
+def style(sku: str) -> str:
+    """Base style of a SKU: everything before its size suffix ('350027-M' -> '350027-')"""
+    cut = sku.rfind('-')
+    return sku[:cut + 1] if cut > 0 else sku
+
+class SkuCatalog:
+    """Known SKUs and descriptions, loaded from CSV (columns sku, description) or JSON
+
+    JSON is a list of {"sku", "description"} objects, or {"skus": [...]} holding one.
+    SKUs are compared case-insensitively. Lookups are binary searches over the sorted
+    SKUs, and a style's sizes are one contiguous range of it.
+    """
+    _shared = None
+
+    def __init__(self, paths: Iterable[str] = ()):
+        entries = {}
+        for path in paths:
+            with open(path, 'rb') as f:
+                data = f.read()
+            for sku, description in self._read(path, data):
+                sku = sku.strip().upper()
+                if sku:
+                    entries[sku] = description.strip()
+        self.skus = sorted(entries)
+        self.descriptions = [entries[sku] for sku in self.skus]
+        self._known = frozenset(self.skus)
+        # Characters SKUs are made of: the only ones worth trying in a near-miss search
+        self._alphabet = sorted(set(''.join(self.skus)))
+        self._suggested = {}          # unknown SKU -> suggestions already worked out
+
+    @staticmethod
+    def _read(path: str, data: bytes) -> Iterable[Tuple[str, str]]:
+        if Path(path).suffix.lower() == '.json':
+            try:
+                entries = json.loads(data)
+            except ValueError as e:
+                raise ValueError(f"{path}: not valid JSON: {e}")
+            if isinstance(entries, dict):
+                entries = entries.get('skus', [])
+            return [(str(entry['sku']), str(entry.get('description', ''))) for entry in entries]
+        reader = csv.DictReader(io.StringIO(data.decode('utf-8-sig')))
+        if 'sku' not in (reader.fieldnames or ()):
+            raise ValueError(f"{path}: needs a 'sku' column (and optionally 'description')")
+        return [(row['sku'] or '', row.get('description') or '') for row in reader]
+
+    @classmethod
+    def shared(cls) -> "SkuCatalog":
+        """The catalog for this process, loaded on first use; empty when none is configured"""
+        if cls._shared is None:
+            paths = [str(CATALOG_PATH)] if CATALOG_PATH.exists() else []
+            paths += [p for p in os.environ.get(CATALOG_ENV_VAR, "").split(os.pathsep) if p]
+            cls._shared = cls(paths)
+        return cls._shared
+
+    def __len__(self) -> int:
+        return len(self.skus)
+
+    def __bool__(self) -> bool:
+        return bool(self.skus)
+
+    def _find(self, sku: str) -> int:
+        """Index of sku in the sorted array, or -1"""
+        k = bisect.bisect_left(self.skus, sku)
+        return k if k < len(self.skus) and self.skus[k] == sku else -1
+
+    def __contains__(self, sku: str) -> bool:
+        return self._find(sku.strip().upper()) >= 0
+
+    def description(self, sku: str) -> Optional[str]:
+        """The catalog description of sku, or None when it isn't in the catalog"""
+        k = self._find(sku.strip().upper())
+        return self.descriptions[k] if k >= 0 else None
+
+    def variants(self, sku: str) -> List[str]:
+        """Every catalog SKU of sku's style (its other sizes), from one range of the sorted array"""
+        prefix = style(sku.strip().upper())
+        start = bisect.bisect_left(self.skus, prefix)
+        end = bisect.bisect_left(self.skus, prefix + '\uffff', start)
+        return self.skus[start:end]
+
+    def suggest(self, sku: str, limit: int = MAX_SUGGESTIONS) -> List[str]:
+        """Catalog SKUs sku was probably meant to be, closest first
+
+        Candidates are one edit away (a character wrong, missing, extra or swapped with its
+        neighbour), then other sizes of the same style. Only the strings one edit from sku are
+        looked up, so the cost depends on the SKU's length, not on the size of the catalog.
+        """
+        sku = sku.strip().upper()
+        if not sku or not self.skus:
+            return []
+        found = self._suggested.get(sku)
+        if found is None:
+            near = sorted(self._one_edit(sku) & self._known)
+            # Swapped characters (same characters, reordered) are the likeliest typo
+            letters = sorted(sku)
+            near.sort(key=lambda candidate: sorted(candidate) != letters)
+            found = near + [v for v in self.variants(sku) if v != sku and v not in near]
+            self._suggested[sku] = found
+        return found[:limit]
+
+    def _one_edit(self, sku: str) -> set:
+        """Every string one edit from sku over the catalog's alphabet"""
+        splits = [(sku[:k], sku[k:]) for k in range(len(sku) + 1)]
+        edits = {head + tail[1:] for head, tail in splits if tail}
+        edits.update(head + tail[1] + tail[0] + tail[2:] for head, tail in splits if len(tail) > 1)
+        for ch in self._alphabet:
+            edits.update(head + ch + tail[1:] for head, tail in splits if tail)
+            edits.update(head + ch + tail for head, tail in splits)
+        edits.discard(sku)
+        return edits
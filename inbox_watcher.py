@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Watch-folder pipeline for the Document Matcher
+Matches SO/PO PDFs as they land in an inbox and writes results to an outbox
+Run: python document_matcher.py watch Inbox Outbox
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import matcher_core as dm
+
+watch_log = logging.getLogger("document_matcher.watch")
+
+# Seconds between inbox scans
+DEFAULT_INTERVAL = 2.0
+# A file counts as fully written once its size and mtime have held this long
+DEFAULT_SETTLE = 2.0
+# Comparisons in flight per worker; the rest wait in the queue
+IN_FLIGHT_PER_WORKER = 2
+
+# Queue states: queued (stable, not yet indexed) -> indexed (SO) / pairing (PO)
+# -> waiting (no SO yet) / running -> done / failed; files that aren't SO-/PO- are ignored
+
+class WatchQueue:
+    """Durable SQLite record of every inbox file and where it is in the pipeline
+
+    Keyed by path; a row is only re-queued when the file's mtime or size changes, so a
+    restart neither loses in-progress files nor reprocesses finished ones.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS queue ("
+            " path TEXT PRIMARY KEY, kind TEXT NOT NULL, mtime REAL NOT NULL, size INTEGER NOT NULL,"
+            " state TEXT NOT NULL, so_path TEXT, arrived REAL NOT NULL, finished REAL, error TEXT)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS queue_state ON queue(state)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS queue_so ON queue(so_path)")
+        # Work interrupted by a stop is picked up again from the pairing step
+        self._conn.execute("UPDATE queue SET state = 'pairing' WHERE state = 'running'")
+        self._conn.commit()
+
+    def known(self) -> Dict[str, Tuple[float, int]]:
+        """(mtime, size) of every file already queued"""
+        return {row[0]: (row[1], row[2]) for row in self._conn.execute("SELECT path, mtime, size FROM queue")}
+
+    def enqueue(self, path: str, kind: str, mtime: float, size: int, arrived: float):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO queue (path, kind, mtime, size, state, so_path, arrived, finished, error)"
+            " VALUES (?, ?, ?, ?, 'queued', NULL, ?, NULL, NULL)", (path, kind, mtime, size, arrived))
+        self._conn.commit()
+
+    def in_state(self, *states: str) -> list:
+        """(path, kind, arrived, so_path) rows in any of the given states, oldest first"""
+        marks = ", ".join("?" * len(states))
+        return self._conn.execute(
+            f"SELECT path, kind, arrived, so_path FROM queue WHERE state IN ({marks}) ORDER BY arrived",
+            states).fetchall()
+
+    def set_state(self, path: str, state: str, so_path: Optional[str] = None, error: Optional[str] = None):
+        finished = time.time() if state in ('done', 'failed') else None
+        self._conn.execute("UPDATE queue SET state = ?, so_path = COALESCE(?, so_path), finished = ?, error = ?"
+                           " WHERE path = ?", (state, so_path, finished, error, path))
+        self._conn.commit()
+
+    def repair(self, so_path: str, arrived: float) -> int:
+        """Send POs waiting for an SO, or already compared against this (revised) SO, back to pairing"""
+        changed = self._conn.execute(
+            "UPDATE queue SET state = 'pairing' WHERE kind = 'PO' AND state = 'waiting'").rowcount
+        # A re-comparison is timed from the SO revision, not the PO's original arrival
+        changed += self._conn.execute(
+            "UPDATE queue SET state = 'pairing', arrived = ? WHERE kind = 'PO' AND so_path = ?"
+            " AND state IN ('done', 'failed')", (arrived, so_path)).rowcount
+        self._conn.commit()
+        return changed
+
+    def forget(self, path: str):
+        self._conn.execute("DELETE FROM queue WHERE path = ?", (path,))
+        self._conn.commit()
+
+    def counts(self) -> dict:
+        return dict(self._conn.execute("SELECT state, COUNT(*) FROM queue GROUP BY state").fetchall())
+
+class InboxWatcher:
+    """Poll an inbox, pair arriving POs with SOs through the order index and compare them on a bounded pool
+
+    Polling (os.scandir) rather than inotify: it needs no extra package and also works on
+    the network shares the ERP writes to, where change notifications are unreliable.
+    """
+
+    def __init__(self, inbox: str, outbox: str, workers: Optional[int] = None,
+                 interval: float = DEFAULT_INTERVAL, settle: float = DEFAULT_SETTLE,
+                 index_path: Optional[str] = None, queue_path: Optional[str] = None,
+                 cache_path: Optional[str] = None, cache_size: int = dm.PDFCache.DEFAULT_MAX_BYTES,
+                 ocr_workers: Optional[int] = None):
+        self.inbox = Path(inbox).resolve()
+        self.outbox = Path(outbox).resolve()
+        self.outbox.mkdir(parents=True, exist_ok=True)
+        self.workers = workers or os.cpu_count() or 1
+        self.interval = interval
+        self.settle = settle
+        self.cache_path = cache_path
+        self.cache_size = cache_size
+        self.index = dm.OrderIndex(index_path)
+        self.queue = WatchQueue(queue_path or str(self.outbox / ".matcher_watch.sqlite3"))
+        self.known = self.queue.known()
+        # path -> (mtime, size, first seen, last changed) for files still being written
+        self.settling = {}
+        self.running = {}  # future -> (PO path, arrival time, (mtime, size) compared)
+        self.pool = None
+        # Pairs with a scanned document are re-run on their own pool, outside the in-flight limit
+        self.ocr_workers = dm.default_ocr_workers() if ocr_workers is None else ocr_workers
+        self.ocr_running = {}
+        self.ocr_pool = None
+
+    def scan(self) -> int:
+        """Queue files that have stopped changing; returns how many were queued"""
+        now = time.time()
+        queued = 0
+        present = set()
+        stack = [str(self.inbox)]
+        while stack:
+            try:
+                entries = list(os.scandir(stack.pop()))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                if not entry.name.lower().endswith('.pdf'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                path = entry.path
+                present.add(path)
+                current = (stat.st_mtime, stat.st_size)
+                if self.known.get(path) == current:
+                    continue
+                seen = self.settling.get(path)
+                if seen is None or seen[:2] != current:
+                    # New or still growing: start (or restart) the settle clock
+                    self.settling[path] = (current[0], current[1], seen[2] if seen else now, now)
+                    continue
+                if now - seen[3] < self.settle or current[1] == 0:
+                    continue
+                del self.settling[path]
+                kind, _ = dm.order_number(path)
+                self.queue.enqueue(path, kind, current[0], current[1], seen[2])
+                self.known[path] = current
+                queued += 1
+        for path in [p for p in self.settling if p not in present]:
+            del self.settling[path]
+        return queued
+
+    def dispatch(self):
+        """Index queued files, then pair and submit POs while the pool has room"""
+        queued = self.queue.in_state('queued')
+        if queued:
+            # Files removed after this check are skipped (and counted as failed) by index_files
+            paths = [row[0] for row in queued if os.path.exists(row[0])]
+            self.index.index_files(paths, pool=self.pool)
+            for path, kind, arrived, _ in queued:
+                if not os.path.exists(path):
+                    self.queue.forget(path)
+                    self.known.pop(path, None)
+                elif kind == 'SO':
+                    self.queue.set_state(path, 'indexed')
+                    self.queue.repair(path, arrived)
+                elif kind == 'PO':
+                    self.queue.set_state(path, 'pairing')
+                else:
+                    self.queue.set_state(path, 'ignored')
+
+        limit = self.workers * IN_FLIGHT_PER_WORKER
+        for po_path, _, arrived, _ in self.queue.in_state('pairing'):
+            if len(self.running) >= limit:
+                break
+            so_path = self.index.find_so(po_path)
+            if so_path is None:
+                self.queue.set_state(po_path, 'waiting')
+                continue
+            future = self.pool.submit(dm.compare_pair, so_path, po_path, self.cache_path, self.cache_size)
+            self.running[future] = (po_path, arrived, self.known.get(po_path))
+            self.queue.set_state(po_path, 'running', so_path=so_path)
+
+    def collect(self) -> int:
+        """Write finished comparisons to the outbox; returns how many finished"""
+        finished = 0
+        for running in (self.running, self.ocr_running):
+            for future in [future for future in running if future.done()]:
+                po_path, arrived, compared = running.pop(future)
+                if self.known.get(po_path) != compared:
+                    # The PO was revised (or removed) while this ran; the revision has its own queue entry
+                    watch_log.info("Dropping result for superseded %s", Path(po_path).name)
+                    continue
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'po': po_path, 'match': False, 'issues': [], 'error': str(e)}
+                if result.get('scanned') and self.ocr_pool is not None:
+                    ocr_future = self.ocr_pool.submit(dm.compare_pair, result['so'], po_path, self.cache_path,
+                                                      self.cache_size, True)
+                    self.ocr_running[ocr_future] = (po_path, arrived, compared)
+                    watch_log.info("Reading scanned pair with OCR: %s", Path(po_path).name)
+                    continue
+                result['latency_s'] = round(time.time() - arrived, 2)
+                self._write_outbox(po_path, result)
+                self.queue.set_state(po_path, 'failed' if result['error'] else 'done', error=result['error'])
+                status = 'ERROR' if result['error'] else 'MATCH' if result['match'] else 'MISMATCH'
+                print(f"{status:8} {Path(po_path).name} ({result['latency_s']:.1f}s after arrival)", file=sys.stderr)
+                finished += 1
+        return finished
+
+    def _write_outbox(self, po_path: str, result: dict):
+        """<PO name>.json for every comparison, plus <PO name>.mismatch.txt when review is needed"""
+        stem = Path(po_path).stem
+        self._write_atomic(self.outbox / f"{stem}.json", json.dumps(result, indent=2))
+        report = self.outbox / f"{stem}.mismatch.txt"
+        if result['match']:
+            if report.exists():
+                report.unlink()
+            return
+        lines = [f"SO: {result.get('so', '')}", f"PO: {po_path}", ""]
+        if result['error']:
+            lines.append(f"ERROR: {result['error']}")
+        else:
+            lines.append("STATUS: MISMATCH - MANUAL REVIEW REQUIRED")
+            lines.extend(f"  - {issue}" for issue in result['issues'])
+        self._write_atomic(report, "\n".join(lines) + "\n")
+
+    @staticmethod
+    def _write_atomic(path: Path, text: str):
+        # Readers of the outbox never see a half-written file
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(text, encoding='utf-8')
+        os.replace(tmp, path)
+
+    def tick(self):
+        """One scan / dispatch / collect round"""
+        self.collect()
+        self.scan()
+        self.dispatch()
+
+    def run(self):
+        """Watch until interrupted"""
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=dm.configure_logging)
+        if self.ocr_workers:
+            self.ocr_pool = ProcessPoolExecutor(max_workers=self.ocr_workers, initializer=dm.configure_logging)
+        print(f"Watching {self.inbox} -> {self.outbox} ({self.workers} workers, every {self.interval:g}s)",
+              file=sys.stderr)
+        try:
+            while True:
+                self.tick()
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            # Interrupted comparisons stay 'running' in the queue and are redone on restart
+            self.pool.shutdown(cancel_futures=True)
+            if self.ocr_pool is not None:
+                self.ocr_pool.shutdown(cancel_futures=True)
+            counts = self.queue.counts()
+            watch_log.info("Stopped: %s", counts)
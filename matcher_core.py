@@ -0,0 +1,2170 @@
+#!/usr/bin/env python3
+"""
+Parsing and matching core of the Document Matcher, importable without the GUI or Tk
+Data models, PDF extraction and parsing, the cache and order index, and batch comparison
+PDF engines, OCR, numpy and worker processes are only imported when first used
+"""
+
+import re
+import os
+import contextlib
+import math
+import sys
+import csv
+import json
+import hashlib
+import sqlite3
+import time
+import logging
+import importlib.util
+import itertools
+from abc import ABC, abstractmethod
+from concurrent.futures import as_completed, wait, FIRST_COMPLETED
+from pathlib import Path
+from dataclasses import dataclass, asdict, field, replace
+from typing import List, Tuple, Optional, Iterable, Iterator, TYPE_CHECKING
+from collections import defaultdict, deque
+
+from alignment import align_items
+import addresses
+import similarity
+import pdf_io
+from catalog import SkuCatalog
+from master_data import MasterData
+from pdf_io import MappedPDF
+from similarity import Status
+
+if TYPE_CHECKING:  # worker processes are started on first use
+    from concurrent.futures import ProcessPoolExecutor
+
+# Diagnostics are off unless configure_logging() (or the DOCUMENT_MATCHER_LOG env var) turns them on.
+# Each parse stage has its own logger so one stage can be traced without flooding the output.
+log = logging.getLogger("document_matcher")
+log.addHandler(logging.NullHandler())
+extract_log = logging.getLogger("document_matcher.extract")
+ship_to_log = logging.getLogger("document_matcher.ship_to")
+items_log = logging.getLogger("document_matcher.line_items")
+gui_log = logging.getLogger("document_matcher.gui")
+LOG_STAGES = ('extract', 'ocr', 'ship_to', 'line_items', 'gui', 'service', 'watch')
+LOG_ENV_VAR = "DOCUMENT_MATCHER_LOG"
+
+def parse_log_spec(spec: str) -> Tuple[Optional[str], dict]:
+    """(level for every stage or None, {stage: level}) from a configure_logging() spec
+
+    Raises ValueError naming the unknown stage or level.
+    """
+    level, stages = None, {}
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        stage, _, value = part.rpartition('=')
+        stage, value = stage.strip(), value.strip().upper()
+        if '=' in part and stage not in LOG_STAGES:
+            raise ValueError(f"Unknown log stage '{stage}' (expected one of {', '.join(LOG_STAGES)})")
+        if not isinstance(logging.getLevelName(value), int):
+            raise ValueError(f"Unknown log level '{value}' (expected DEBUG, INFO, WARNING, ERROR or CRITICAL)")
+        if '=' in part:
+            stages[stage] = value
+        else:
+            level = value
+    return level, stages
+
+def configure_logging(spec: Optional[str] = None):
+    """Enable diagnostics on stderr from a spec like 'INFO' or 'WARNING,ship_to=DEBUG,line_items=DEBUG'
+
+    A bare level applies to every stage; stage=LEVEL entries override it. With no spec the
+    DOCUMENT_MATCHER_LOG environment variable is used, and if that is unset nothing changes.
+    A bad spec raises ValueError; a bad environment variable is reported and ignored, since
+    this also runs as the initializer of every worker pool.
+    """
+    if spec is None:
+        spec = os.environ.get(LOG_ENV_VAR, "")
+        try:
+            level, stages = parse_log_spec(spec)
+        except ValueError as e:
+            print(f"[WARNING] document_matcher: ignoring {LOG_ENV_VAR}: {e}", file=sys.stderr)
+            return
+    else:
+        level, stages = parse_log_spec(spec)
+    if not spec:
+        return
+    if not any(isinstance(h, logging.StreamHandler) for h in log.handlers):
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("[%(levelname)s] %(name)s: %(message)s"))
+        log.addHandler(handler)
+    log.setLevel(level or logging.WARNING)
+    for stage, stage_level in stages.items():
+        logging.getLogger(f"document_matcher.{stage}").setLevel(stage_level)
+
+# Per-stage timing: off unless --profile (or the DOCUMENT_MATCHER_PROFILE env var) turns it on.
+# '1' records wall/CPU time, pages and lines; 'memory' also traces peak allocations (much slower).
+PROFILE_ENV_VAR = "DOCUMENT_MATCHER_PROFILE"
+PROFILE_STAGES = ('load', 'extract', 'ocr', 'ship_to', 'line_items', 'compare', 'render')
+
+class _NoStage:
+    """What Profiler.stage() hands out while profiling is off: a context manager that does nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, pages: int = 0, lines: int = 0, items: int = 0):
+        pass
+
+_NO_STAGE = _NoStage()
+
+class _Stage(_NoStage):
+    """Times one run of a stage and adds it to the profiler on exit"""
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.pages = self.lines = self.items = 0
+        self.peak = None
+
+    def __enter__(self):
+        if self.profiler.memory:
+            import tracemalloc
+            # tracemalloc keeps a single peak, so the enclosing stage's peak so far is
+            # parked on it before the reset and handed back on exit
+            stack = self.profiler._stack
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].carried = max(stack[-1].carried, peak)
+            tracemalloc.reset_peak()
+            self.base = current
+            self.carried = 0
+            stack.append(self)
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        if self.profiler.memory:
+            import tracemalloc
+            stack = self.profiler._stack
+            stack.pop()
+            peak = max(tracemalloc.get_traced_memory()[1], self.carried)
+            if stack:
+                stack[-1].carried = max(stack[-1].carried, peak)
+            # Reported as growth over what was allocated when the stage started
+            self.peak = peak - self.base
+        self.profiler.add(self.name, wall, cpu, self.pages, self.lines, self.items, self.peak)
+        return False
+
+    def count(self, pages: int = 0, lines: int = 0, items: int = 0):
+        self.pages += pages
+        self.lines += lines
+        self.items += items
+
+class Profiler:
+    """Accumulates wall time, CPU time, pages, lines, items and peak memory per stage for one process"""
+
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.stages = {}
+        self._stack = []
+
+    def configure(self, spec: Optional[str] = None):
+        """Turn profiling on from a spec ('1' or 'memory'); with no spec DOCUMENT_MATCHER_PROFILE is used"""
+        spec = (spec if spec is not None else os.environ.get(PROFILE_ENV_VAR, "")).strip().lower()
+        self.enabled = spec not in ("", "0", "off", "false", "no")
+        self.memory = self.enabled and spec == "memory"
+        if self.memory:
+            # Imported only here: tracing is opt-in and the module isn't needed otherwise
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+        self.reset()
+
+    def stage(self, name: str):
+        """Context manager timing one stage run, or a shared no-op while profiling is off"""
+        return _Stage(self, name) if self.enabled else _NO_STAGE
+
+    def add(self, name: str, wall: float, cpu: float, pages: int = 0, lines: int = 0, items: int = 0,
+            peak: Optional[int] = None):
+        """Record one run of a stage; peak is only given where memory was traced around it"""
+        entry = self.stages.get(name)
+        if entry is None:
+            entry = self.stages[name] = {'calls': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0,
+                                         'pages': 0, 'lines': 0, 'items': 0}
+        entry['calls'] += 1
+        entry['wall_ms'] += wall * 1000
+        entry['cpu_ms'] += cpu * 1000
+        entry['pages'] += pages
+        entry['lines'] += lines
+        entry['items'] += items
+        if peak is not None:
+            entry['peak_kb'] = max(entry.get('peak_kb', 0.0), peak / 1024)
+
+    def reset(self):
+        self.stages = {}
+        self._stack = []
+
+    def report(self) -> dict:
+        """Stage totals since the last reset, rounded for output"""
+        report = {}
+        for name, entry in self.stages.items():
+            # Counts a stage doesn't deal in (pages for compare, ...) are left out
+            report[name] = {key: round(value, 3) if isinstance(value, float) else value
+                            for key, value in entry.items()
+                            if value or key in ('wall_ms', 'cpu_ms', 'peak_kb')}
+        return report
+
+profiler = Profiler()
+profiler.configure()
+
+def profiled_call(fn, *args):
+    """Run fn with a fresh profile, returning (result, stage report); used to bring worker timings back"""
+    profiler.reset()
+    result = fn(*args)
+    return result, profiler.report()
+
+def merge_profiles(reports: Iterable[dict]) -> dict:
+    """Sum stage reports (peak memory is the largest seen)"""
+    merged = {}
+    for report in reports:
+        for name, row in report.items():
+            total = merged.setdefault(name, dict.fromkeys(row, 0))
+            for key, value in row.items():
+                total[key] = max(total.get(key, 0), value) if key == 'peak_kb' else round(total.get(key, 0) + value, 3)
+    return merged
+
+def format_profile(report: dict) -> str:
+    """One line per stage, in pipeline order"""
+    lines = []
+    for name in sorted(report, key=lambda n: PROFILE_STAGES.index(n) if n in PROFILE_STAGES else len(PROFILE_STAGES)):
+        row = report[name]
+        text = f"{name:11} {row['wall_ms']:9.1f} ms wall {row['cpu_ms']:9.1f} ms cpu  x{row['calls']}"
+        for key in ('pages', 'lines', 'items'):
+            if row.get(key):
+                text += f"  {row[key]} {key}"
+        if 'peak_kb' in row:
+            text += f"  peak {row['peak_kb']:.0f} KiB"
+        lines.append(text)
+    return "\n".join(lines)
+
+# Parsed values are immutable and slotted: a night of batch results holds millions of them
+@dataclass(frozen=True, slots=True)
+class ShipToAddress:
+    name: str = ""
+    address: str = ""
+    city: str = ""
+    state: str = ""
+    zip_code: str = ""
+
+@dataclass(frozen=True, slots=True)
+class LineItem:
+    sku: str = ""
+    description: str = ""
+    qty: int = 0
+    # Where the item's first line is: 1-based page and line on that page (0 when not from a document)
+    page: int = field(default=0, compare=False)
+    line: int = field(default=0, compare=False)
+
+# Line-item patterns, compiled once at import instead of on every line and every SKU
+ITEMS_END_RE = re.compile(r"Subtotal|Shipping|Tariff|Notes|approval|Total", re.IGNORECASE)
+SO_ITEM_RE = re.compile(r"^\d+\s+Drop Ship\s+([\w\-]+)\s+(.*)")
+SO_QTY_RE = re.compile(r"(\d+)ea")
+SO_TRAILING_PRICE_RE = re.compile(r"\$\d+(\.\d{2})?$")
+SO_PRICE_RE = re.compile(r"\$\d+(\.\d{2})?")
+SO_QTY_TAIL_RE = re.compile(r"\s*\d+ea")
+PO_ITEM_RE = re.compile(r"^\d+\s+([\w\-.]+)\s+(.*)")
+PO_QTY_RE = re.compile(r"(\d+)\s*ea")
+PO_PRICE_RE = re.compile(r"\$[\d,.]+")
+PO_QTY_WORD_RE = re.compile(r"\b\d+\s*ea\b", re.IGNORECASE)
+TOTAL_COST_RE = re.compile(r"Total Cost", re.IGNORECASE)
+QTY_EA_RE = re.compile(r"\d+\s*ea")
+AMOUNT_SEPARATORS = frozenset('.,')
+
+# Items table headers, matched line by line against the lowercased line with spaces removed:
+# the SO header is three lines ('Item' / '... Number ... Qty' / '... Ordered ...'), the PO header one
+SO_HEADER = ('^item$', 'number.*qty|qty.*number', 'ordered')
+PO_HEADER = ('^item#?numberdescription',)
+
+SHIP_TO_HEADERS = ['ITEM', 'TYPE', 'NUMBER', 'DESCRIPTION', 'BILL TO', 'NOTES', 'BUYER', 'PAYMENT', 'FOB', 'SHIPPING', 'CREATED', 'VENDOR']
+SHIP_TO_SKIP = ['UNITED STATES', 'USA', 'PAKISTAN']
+VENDOR_KEYWORDS = ['fuji', 'pakistan', 'muhabbat', 'khan', 'industrial', 'estate', 'sialkot', 'daska']
+CITY_STATE_ZIP_RE = re.compile(r'([A-Z][A-Z\s,]*?)\s+([A-Z]{2})\s+(\d{5}(?:-\d{4})?)')
+FAX_CITY_STATE_ZIP_RE = re.compile(r'([A-Z][A-Z\s,]*?)\s*,?\s*([A-Z]{2})\s+(\d{5}(?:-\d{4})?)')
+
+LAYOUTS_PATH = Path(__file__).with_name("layouts.json")
+LAYOUTS_ENV_VAR = "DOCUMENT_MATCHER_LAYOUTS"
+# Lines from the top of the first page a layout is recognised from
+DETECT_LINES = 40
+SHIP_TO_MODES = ('block', 'fax', 'block_or_fax')
+
+@dataclass(frozen=True)
+class Layout:
+    """One document template: how it is recognised, and the patterns its specialised parsers use
+
+    detect tokens must all appear (case-insensitively) near the top of the first page and
+    exclude tokens must not. ship_to is 'block' (a 'Ship To:' block), 'fax' (the customer
+    on the 'Fax:' line, so the block scan is skipped) or 'block_or_fax' (block, falling
+    back to fax). headers lists the table header alternatives, one pattern per line.
+    """
+    name: str
+    kind: str                                   # 'SO' or 'PO'
+    detect: Tuple[str, ...] = ()
+    exclude: Tuple[str, ...] = ()
+    ship_to: str = 'block_or_fax'
+    block_end: Tuple[str, ...] = tuple(SHIP_TO_HEADERS)
+    skip_lines: Tuple[str, ...] = tuple(SHIP_TO_SKIP)
+    vendor_keywords: Tuple[str, ...] = tuple(VENDOR_KEYWORDS)
+    headers: Tuple[Tuple[re.Pattern, ...], ...] = ()
+    row: Optional[re.Pattern] = None
+    qty: Optional[re.Pattern] = None
+    description: str = ''                       # description cleaner: 'so' or 'po'
+    end: re.Pattern = ITEMS_END_RE
+
+    @classmethod
+    def from_config(cls, entry: dict) -> "Layout":
+        """Build a layout from one layouts.json entry; omitted settings take the kind's defaults"""
+        entry = dict(entry)
+        name = entry.pop('name', None)
+        kind = str(entry.pop('kind', '')).upper()
+        if not name or kind not in ('SO', 'PO'):
+            raise ValueError(f"Layout {name or entry!r} needs a name and a kind of 'SO' or 'PO'")
+        settings = {'name': name}
+        try:
+            for key in ('detect', 'exclude', 'vendor_keywords'):
+                if key in entry:
+                    settings[key] = tuple(token.lower() for token in entry.pop(key))
+            for key in ('block_end', 'skip_lines'):
+                if key in entry:
+                    settings[key] = tuple(token.upper() for token in entry.pop(key))
+            if 'headers' in entry:
+                settings['headers'] = tuple(tuple(re.compile(p) for p in header) for header in entry.pop('headers'))
+            for key in ('row', 'qty'):
+                if key in entry:
+                    settings[key] = re.compile(entry.pop(key))
+            if 'end' in entry:
+                settings['end'] = re.compile(entry.pop('end'), re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"Layout {name!r}: bad pattern: {e}")
+        for key in ('ship_to', 'description'):
+            if key in entry:
+                settings[key] = entry.pop(key)
+        if entry:
+            raise ValueError(f"Layout {name!r}: unknown settings {', '.join(sorted(entry))}")
+        return cls.generic(kind, **settings)
+
+    @classmethod
+    def generic(cls, kind: str, **settings) -> "Layout":
+        """A layout for kind with the general-purpose patterns, overridden by settings"""
+        is_so = kind == 'SO'
+        defaults = {'name': f"generic-{kind.lower()}", 'kind': kind,
+                    'headers': tuple(tuple(re.compile(p) for p in header) for header in (SO_HEADER, PO_HEADER)),
+                    'row': SO_ITEM_RE if is_so else PO_ITEM_RE, 'qty': SO_QTY_RE if is_so else PO_QTY_RE,
+                    'description': 'so' if is_so else 'po'}
+        defaults.update(settings)
+        layout = cls(**defaults)
+        if layout.ship_to not in SHIP_TO_MODES:
+            raise ValueError(f"Layout {layout.name!r}: ship_to must be one of {', '.join(SHIP_TO_MODES)}")
+        if layout.description not in ('so', 'po'):
+            raise ValueError(f"Layout {layout.name!r}: description must be 'so' or 'po'")
+        if not layout.headers or not all(layout.headers):
+            raise ValueError(f"Layout {layout.name!r}: headers needs at least one non-empty header")
+        return layout
+
+    def matches(self, head: str) -> bool:
+        """Whether the lowercased top-of-document text head fits this layout"""
+        return all(token in head for token in self.detect) and not any(token in head for token in self.exclude)
+
+class LayoutRegistry:
+    """Known document layouts, tried in order; a document is fingerprinted once and routed to the first match
+
+    Layouts come from layouts.json next to this script, then from any files listed in
+    DOCUMENT_MATCHER_LAYOUTS (os.pathsep-separated), whose layouts are tried first and
+    replace built-in ones of the same name. Documents no layout fits get the generic one
+    for their kind, which recognises every table header and Ship To style.
+    """
+    _shared = None
+
+    def __init__(self, paths: Iterable[str] = ()):
+        self.layouts = []
+        self.generic = {kind: Layout.generic(kind) for kind in ('SO', 'PO')}
+        digest = hashlib.sha256()
+        for path in paths:
+            with open(path, 'rb') as f:
+                data = f.read()
+            digest.update(data)
+            try:
+                entries = json.loads(data)
+            except ValueError as e:
+                raise ValueError(f"{path}: not valid JSON: {e}")
+            loaded = [Layout.from_config(entry) for entry in entries.get('layouts', [])]
+            names = {layout.name for layout in loaded}
+            self.layouts = loaded + [layout for layout in self.layouts if layout.name not in names]
+        # Changes whenever the layout files do, so cached parses made under other layouts are ignored
+        self.digest = digest.hexdigest()[:12]
+
+    @classmethod
+    def shared(cls) -> "LayoutRegistry":
+        """The registry for this process, loaded on first use"""
+        if cls._shared is None:
+            paths = [str(LAYOUTS_PATH)] if LAYOUTS_PATH.exists() else []
+            paths += [p for p in os.environ.get(LAYOUTS_ENV_VAR, "").split(os.pathsep) if p]
+            cls._shared = cls(paths)
+        return cls._shared
+
+    def get(self, name: str) -> Layout:
+        for layout in self.layouts + list(self.generic.values()):
+            if layout.name == name:
+                return layout
+        raise KeyError(f"Unknown layout: {name}")
+
+    @staticmethod
+    def head(lines: Iterator[str]) -> List[str]:
+        """Take the lines a layout is detected from: up to DETECT_LINES, stopping after the first page break"""
+        head = []
+        for line in lines:
+            head.append(line)
+            if line is PAGE_BREAK or len(head) >= DETECT_LINES:
+                break
+        return head
+
+    def detect(self, head: Iterable[str], kind: Optional[str] = None) -> Layout:
+        """The first layout of kind (any kind when None) whose tokens fit the head lines"""
+        text = "\n".join(line for line in head if line is not PAGE_BREAK).lower()
+        for layout in self.layouts:
+            if (kind is None or layout.kind == kind) and layout.matches(text):
+                return layout
+        return self.generic[kind or 'PO']
+
+class ShipToParser:
+    """Incremental Ship To parser: feed() lines in document order, then close() for the address
+
+    Lines are only held until they have been scanned, and done turns True as soon as a
+    'Ship To:' block yields a name and address (or, for a 'fax' layout, the 'Fax:' lines
+    have been read), so callers can stop reading pages. layout picks which of those styles
+    are looked for and the words that end, skip or reject a block.
+    """
+
+    def __init__(self, layout: Optional[Layout] = None):
+        layout = layout or LayoutRegistry.shared().generic['PO']
+        self._block_mode = layout.ship_to != 'fax'
+        self._fax_mode = layout.ship_to != 'block'
+        self._block_end = layout.block_end
+        self._skip_lines = frozenset(layout.skip_lines)
+        # The layout's vendor keywords plus the master data's vendors, found in one pass per block
+        self._vendors = MasterData.shared().vendor_index(layout.vendor_keywords)
+        self._fields = {}         # ShipToAddress field -> value found so far
+        self.done = False
+        self._line_no = 0
+        self._pending = deque()   # lines not yet scanned for a 'Ship To:' header
+        self._collecting = False  # a header was found; its block is being read from _pending
+        self._collected = []
+        self._peek = 0
+        self._block_line = 0
+        self._fax = None          # first 'Fax:' line and up to two following lines
+        # Checked once: the per-line trace is too hot to pay even a disabled logging call
+        self._trace = ship_to_log.isEnabledFor(logging.DEBUG)
+
+    def feed(self, line: str):
+        if not self.done:
+            self._pending.append(line)
+            self._advance(final=False)
+
+    def close(self) -> ShipToAddress:
+        """Finish parsing, falling back to the PO 'Fax:' layout if no Ship To block matched"""
+        if not self.done:
+            self._advance(final=True)
+        if not self.done:
+            self.done = True
+            if self._fax_mode:
+                self._apply_fax()
+            else:
+                ship_to_log.debug("No ship-to block found")
+        return self.address
+
+    @property
+    def address(self) -> ShipToAddress:
+        return ShipToAddress(**self._fields)
+
+    def _advance(self, final: bool):
+        while not self.done:
+            if self._collecting:
+                if not self._collect() and not final:
+                    return  # the block may continue on the next line
+                self._collecting = False
+                if self._apply_block():
+                    self.done = True
+                    return
+                # Keep scanning right after the failed header, including the lines just read
+                continue
+            if not self._pending:
+                return
+            line = self._pending.popleft()
+            if self._trace:
+                ship_to_log.debug("Line %d: %s", self._line_no, line)
+            self._line_no += 1
+            if self._fax_mode:
+                self._scan_fax(line)
+                if not self._block_mode:
+                    if self._fax is not None and len(self._fax) == 4:
+                        # The 'Fax:' line and the two after it are all this layout reads
+                        self.done = True
+                        self._apply_fax()
+                    continue
+            if 'Ship To' in line and ':' in line:
+                # Try to extract next 3-4 lines as address
+                self._collecting = True
+                self._collected = []
+                self._peek = 0
+                self._block_line = self._line_no - 1
+
+    def _collect(self) -> bool:
+        """Read block lines without consuming them; returns True once the block has ended"""
+        collected = self._collected
+        while self._peek < len(self._pending):
+            next_line = self._pending[self._peek].strip()
+            self._peek += 1
+            if not next_line:
+                if collected:
+                    return True
+                continue
+            upper = next_line.upper()
+            if any(h in upper for h in self._block_end):
+                return True
+            if upper in self._skip_lines:
+                continue
+            if len(collected) >= 4:
+                return True
+            collected.append(next_line)
+        return False
+
+    def _apply_block(self) -> bool:
+        collected = self._collected
+        # Check for vendor keywords in the collected address
+        vendor = self._vendors.search("\n".join(collected))
+        if vendor:
+            ship_to_log.debug("Skipped vendor block at line %d (%r): %s", self._block_line, vendor, collected)
+            return False
+        fields = self._fields
+        if len(collected) >= 1:
+            fields['name'] = collected[0]
+        if len(collected) >= 2:
+            fields['address'] = collected[1]
+        if len(collected) >= 3:
+            match = CITY_STATE_ZIP_RE.search(" ".join(collected[2:]))
+            if match:
+                fields.update(city=match.group(1).replace(',', '').strip(), state=match.group(2),
+                              zip_code=match.group(3))
+        if fields.get('name') and fields.get('address'):
+            ship_to_log.debug("Ship To block at line %d: %s", self._block_line, self.address)
+            return True
+        return False
+
+    def _scan_fax(self, line: str):
+        if self._fax is None:
+            if 'Fax:' in line and len(line.strip()) > 5:
+                self._fax = [self._line_no - 1, line]
+        elif len(self._fax) < 4:
+            self._fax.append(line)
+
+    def _apply_fax(self):
+        """PO format: the customer name follows 'Fax:', then address and city/state/zip lines"""
+        if self._fax is None:
+            ship_to_log.debug("No ship-to block found")
+            return
+        line_no, line, *following = self._fax
+        fields = self._fields
+        parts = line.split('Fax:')
+        if len(parts) > 1 and parts[1].strip():
+            fields['name'] = parts[1].strip()
+        if len(following) >= 1:
+            fields['address'] = following[0].strip()
+        if len(following) >= 2:
+            match = FAX_CITY_STATE_ZIP_RE.search(following[1].strip())
+            if match:
+                fields.update(city=match.group(1).replace(',', '').strip(), state=match.group(2),
+                              zip_code=match.group(3))
+        ship_to_log.debug("Fax fallback at line %d: %s", line_no, self.address)
+
+# Separates pages in extracted and cached text (as pdftotext does); iter_lines() yields
+# it between pages when asked, so page-aware parsers know where each line is
+PAGE_BREAK = '\f'
+
+# Lines at the top of a continuation page (letterhead, page number, order reference) allowed
+# before the items table is taken to continue without a repeated header; also how far past
+# the end of a table, on later pages, a new table header is looked for
+PAGE_TOP_LINES = 12
+
+class LineItemParser:
+    """Incremental line-item parser: feed() lines in document order, then close() for the items
+
+    A state machine over a single pass: SEEK (before the first table header), TABLE,
+    PAGE_TOP (start of a page the table may continue on, past running headers and page
+    furniture) and AFTER (past an end-of-table line, where another header starts a new
+    table). Rows are paired as they arrive, and an item split across a page break is still
+    paired. Call page_break() between pages; each item records its page and line. done
+    turns True once a table has ended and the top of the next page shows no new header,
+    so callers can stop reading pages. The header, row and qty patterns come from layout
+    (by default the generic layout for is_invoice's kind).
+    """
+    SEEK, TABLE, PAGE_TOP, AFTER = 'seek', 'table', 'page_top', 'after'
+
+    def __init__(self, is_invoice: bool = False, layout: Optional[Layout] = None):
+        layout = layout or LayoutRegistry.shared().generic['SO' if is_invoice else 'PO']
+        self.is_invoice = is_invoice
+        self.layout = layout
+        self.done = False
+        self.state = self.SEEK
+        self.page = 1
+        self.line_no = 0          # line on the current page
+        self.items = []
+        self._item_re, self._qty_re, self._end_re = layout.row, layout.qty, layout.end
+        # One search per line finds any header's first line; single-line headers are then
+        # confirmed, multi-line ones hold lines until they complete
+        self._header_start = re.compile('|'.join(f"(?:{header[0].pattern})" for header in layout.headers))
+        self._single_headers = [header[0] for header in layout.headers if len(header) == 1]
+        self._multi_headers = [header for header in layout.headers if len(header) > 1]
+        self._so_description = layout.description == 'so'
+        self._start = None        # (match, text, page, line) of a row start waiting for its qty line
+        self._broken = False      # a non-row line came after _start on the same page
+        self._held = []           # (line, page, line) of a possible multi-line header
+        self._candidates = []     # multi-line headers the held lines still fit
+        self._ended_page = 0      # page the last table ended on
+        self._skipped = 0         # non-row lines in PAGE_TOP / lines on later pages in AFTER
+        self._trace = items_log.isEnabledFor(logging.DEBUG)
+
+    def feed(self, line: str):
+        if not self.done:
+            self.line_no += 1
+            self._take(line, self.page, self.line_no)
+
+    def page_break(self):
+        """The next line starts a new page"""
+        if self.done:
+            return
+        self.page += 1
+        self.line_no = 0
+        # Whatever followed a row start at the foot of the page was footer, not part of the row
+        self._broken = False
+        if self.state == self.TABLE:
+            self.state = self.PAGE_TOP
+            self._skipped = 0
+
+    def close(self) -> List[LineItem]:
+        # Lines held for a header that never completed are ordinary lines
+        held, self._held = self._held, []
+        self._candidates = []
+        for entry in held:
+            if not self.done:
+                self._line(*entry)
+        self.done = True
+        items_log.debug("Extracted items: %s", self.items)
+        return self.items
+
+    def _take(self, line: str, page: int, line_no: int):
+        if self.done:
+            return
+        if self._held:
+            self._held.append((line, page, line_no))
+            self._check_header()
+            return
+        compact = line.replace(' ', '').lower()
+        if not self._header_start.search(compact):
+            self._line(line, page, line_no, maybe_header=False)
+            return
+        candidates = [header for header in self._multi_headers if header[0].search(compact)]
+        if candidates:
+            self._held.append((line, page, line_no))
+            self._candidates = candidates
+        else:
+            self._line(line, page, line_no)
+
+    def _check_header(self):
+        held = self._held
+        n = len(held) - 1
+        compact = held[n][0].replace(' ', '').lower()
+        self._candidates = [header for header in self._candidates if header[n].search(compact)]
+        if any(len(header) == len(held) for header in self._candidates):
+            self._held = []
+            self._header(held[0][1], held[0][2])
+            return
+        if self._candidates:
+            return
+        # Not a header after all: replay the held lines, the later ones may start a header themselves
+        self._held = []
+        self._line(*held[0])
+        for entry in held[1:]:
+            self._take(*entry)
+
+    def _header(self, page: int, line_no: int):
+        if self.state == self.AFTER and self._ended_page == page:
+            # A second table on the same page: no row continues into it
+            self._start = None
+        if self._trace:
+            items_log.debug("Items table header at page %d line %d (%s)", page, line_no, self.state)
+        self.state = self.TABLE
+
+    def _line(self, line: str, page: int, line_no: int, maybe_header: bool = True):
+        if maybe_header and self._single_headers:
+            compact = line.replace(' ', '').lower()
+            if any(header.search(compact) for header in self._single_headers):
+                self._header(page, line_no)
+                return
+        state = self.state
+        if state == self.SEEK:
+            return
+        if state == self.AFTER:
+            if page > self._ended_page:
+                self._skipped += 1
+                if self._skipped > PAGE_TOP_LINES:
+                    self.done = True
+            return
+        if self._end_re.search(line):
+            if self._trace:
+                items_log.debug("Items table ended at page %d line %d: %s", page, line_no, line)
+            self.state = self.AFTER
+            self._ended_page = page
+            self._skipped = 0
+            return
+        text = line.strip()
+        if not text:
+            return
+        start = self._start
+        if start is not None and not self._broken:
+            qty = self._qty_re.search(text)
+            if qty:
+                self._add_item(start, text, qty)
+                self._start = None
+                self.state = self.TABLE
+                return
+        match = self._item_re.match(text)
+        if match:
+            self._start = (match, text, page, line_no)
+            self._broken = False
+            self.state = self.TABLE
+        elif state == self.PAGE_TOP:
+            # Running header or page furniture: it neither ends the table nor splits a row
+            self._skipped += 1
+            if self._skipped > PAGE_TOP_LINES:
+                self.state = self.TABLE
+        else:
+            self._broken = True
+            if self._trace:
+                items_log.debug("Not an item line at page %d line %d: %s", page, line_no, text)
+
+    def _add_item(self, start: tuple, text: str, qty_match):
+        match, first, page, line_no = start
+        sku = match.group(1).strip()
+        if self._so_description:
+            # Example first: '1 Drop Ship 350027-M Custom - Storm Training Group Lightweight Shorts Black 350027-M$30.98'
+            # Example second: '6ea $ 185.88'
+            desc = PDFExtractor._so_description(sku, match.group(2), text[:qty_match.start()])
+        else:
+            desc = PDFExtractor._po_description(sku, match.group(2) + ' ' + text)
+        item = LineItem(sku=sku, description=desc, qty=int(qty_match.group(1)), page=page, line=line_no)
+        if self._trace:
+            items_log.debug("Parsed: %s | %s -> %s", first, text, item)
+        self.items.append(item)
+
+class ExtractorBackend(ABC):
+    """A page-text extraction engine; subclasses wrap one PDF library, imported on first use"""
+
+    name = ""
+    module = ""
+
+    def available(self) -> bool:
+        return importlib.util.find_spec(self.module) is not None
+
+    def import_engine(self):
+        """Import and return the engine's module (done on first use; worker pools call it to warm up)"""
+        return importlib.import_module(self.module)
+
+    def iter_pages(self, pdf_path: str, pdf: Optional[MappedPDF] = None) -> Iterator[str]:
+        """Yield the text of each page; pdf is the file already mapped, otherwise it is mapped here"""
+        if pdf is None:
+            with MappedPDF(pdf_path) as pdf:
+                yield from self._pages(pdf)
+        else:
+            yield from self._pages(pdf)
+
+    @abstractmethod
+    def _pages(self, pdf: MappedPDF) -> Iterator[str]:
+        """Yield the text of each page of the mapped file"""
+
+class PyPDF2Backend(ExtractorBackend):
+    """Pure-Python reference engine the parsers were written against"""
+
+    name = "pypdf2"
+    module = "PyPDF2"
+
+    def _pages(self, pdf: MappedPDF) -> Iterator[str]:
+        PyPDF2 = self.import_engine()
+        # PyPDF2 seeks and reads a file object; the mapping is one, so nothing is copied up front
+        pdf_reader = PyPDF2.PdfReader(pdf.stream())
+        for page in pdf_reader.pages:
+            yield page.extract_text()
+
+class PdfiumBackend(ExtractorBackend):
+    """pypdfium2 (Chrome's PDFium), much faster than PyPDF2"""
+
+    name = "pdfium"
+    module = "pypdfium2"
+
+    def _pages(self, pdf: MappedPDF) -> Iterator[str]:
+        import ctypes
+        pypdfium2 = self.import_engine()
+        # PDFium loads from bytes or a ctypes array; a (writable) mapping is wrapped in place
+        if pdf.view.readonly:
+            data = pdf.view.obj
+        else:
+            data = (ctypes.c_char * len(pdf)).from_buffer(pdf.view)
+        document = pypdfium2.PdfDocument(data)
+        try:
+            for page in document:
+                textpage = page.get_textpage()
+                # PDFium separates lines with CRLF and doesn't end the last line; the parsers expect LF
+                text = textpage.get_text_range().replace('\r\n', '\n').replace('\r', '\n')
+                yield text if text.endswith('\n') else text + '\n'
+                textpage.close()
+                page.close()
+        finally:
+            document.close()
+
+class PyMuPDFBackend(ExtractorBackend):
+    """PyMuPDF (MuPDF), the fastest engine when installed"""
+
+    name = "pymupdf"
+    module = "pymupdf"
+
+    def available(self) -> bool:
+        # Releases before 1.24 only install the legacy 'fitz' name
+        return super().available() or importlib.util.find_spec("fitz") is not None
+
+    def import_engine(self):
+        try:
+            import pymupdf
+        except ImportError:
+            import fitz as pymupdf
+        return pymupdf
+
+    def _pages(self, pdf: MappedPDF) -> Iterator[str]:
+        pymupdf = self.import_engine()
+        with pymupdf.open(stream=pdf.view, filetype="pdf") as doc:
+            for page in doc:
+                yield page.get_text()
+
+# Fastest first; 'auto' tries them in this order and PyPDF2 is always the last resort
+BACKENDS = {backend.name: backend for backend in (PyMuPDFBackend(), PdfiumBackend(), PyPDF2Backend())}
+BACKEND_ENV_VAR = "DOCUMENT_MATCHER_BACKEND"
+
+def backend_preference(preference: Optional[str] = None) -> str:
+    """Resolve a backend choice: the argument, else the DOCUMENT_MATCHER_BACKEND environment variable, else 'auto'"""
+    return (preference or os.environ.get(BACKEND_ENV_VAR) or "auto").lower()
+
+def backend_chain(preference: Optional[str] = None) -> List[ExtractorBackend]:
+    """Backends to try for one file, in order, for 'auto' or a backend name
+
+    A named backend is still followed by PyPDF2 in case its output doesn't parse.
+    """
+    preference = backend_preference(preference)
+    if preference == "auto":
+        chain = [backend for backend in BACKENDS.values() if backend.available()]
+    elif preference in BACKENDS:
+        chain = [BACKENDS[preference]]
+        if preference != PyPDF2Backend.name:
+            chain.append(BACKENDS[PyPDF2Backend.name])
+    else:
+        raise ValueError(f"Unknown PDF backend '{preference}' (expected auto or one of {', '.join(BACKENDS)})")
+    return chain or [BACKENDS[PyPDF2Backend.name]]
+
+# A page with fewer non-blank characters than this is taken to be an image (a scan)
+SCANNED_PAGE_CHARS = 20
+
+class ScannedDocumentError(Exception):
+    """A document didn't parse and pages it needed have no text layer, so it has to be OCR'd"""
+
+    def __init__(self, path: str, pages: List[int]):
+        import ocr as ocr_stage
+        message = f"{Path(path).name} looks scanned: page(s) {', '.join(map(str, pages))} have no text layer"
+        if not ocr_stage.available():
+            message += f"; reading it needs {ocr_stage.missing()}"
+        super().__init__(message)
+        self.path = path
+        self.pages = list(pages)
+
+def looks_parsed(address: ShipToAddress, items: List[LineItem]) -> bool:
+    """Sanity check on a parse: a ship-to name and at least one line item"""
+    return bool(address.name) and bool(items)
+
+class PDFExtractor:
+    """Extract text and data from PDF files"""
+    
+    @staticmethod
+    def iter_pages(pdf_path: str, backend: Optional[str] = None) -> Iterator[str]:
+        """Yield the text of each page in order, extracting a page only when it is asked for"""
+        return backend_chain(backend)[0].iter_pages(pdf_path)
+
+    @staticmethod
+    def iter_lines(pages: Iterable[str], page_breaks: bool = False) -> Iterator[str]:
+        """Yield the lines of ''.join(pages).split('\\n') without building the joined text
+
+        With page_breaks, PAGE_BREAK is also yielded once per page boundary, before the
+        first line that starts on the new page.
+        """
+        carry = ''
+        for n, page in enumerate(pages):
+            parts = page.split('\n')
+            # A page that doesn't end in a newline runs on into the next page's first line
+            pending_break = page_breaks and n > 0
+            if pending_break and not carry:
+                yield PAGE_BREAK
+                pending_break = False
+            parts[0] = carry + parts[0]
+            carry = parts.pop()
+            if pending_break:
+                if parts:
+                    yield parts[0]
+                    del parts[0]
+                yield PAGE_BREAK
+            yield from parts
+        yield carry
+
+    @staticmethod
+    def text_lines(text: str, page_breaks: bool = False) -> Iterator[str]:
+        """iter_lines() over extracted text whose pages are separated by PAGE_BREAK"""
+        return PDFExtractor.iter_lines(text.split(PAGE_BREAK), page_breaks)
+
+    @staticmethod
+    def extract_text(pdf_path: str, backend: Optional[str] = None) -> str:
+        """Extract all text from PDF, moving down the backend chain if an engine fails"""
+        with profiler.stage('extract') as stage:
+            try:
+                pdf = MappedPDF(pdf_path).open()
+            except OSError as e:
+                extract_log.warning("Could not read %s: %s", pdf_path, e)
+                return f"ERROR: Could not extract text from PDF: {e}"
+            # Every engine in the chain reads the one mapping
+            with pdf:
+                for engine in backend_chain(backend):
+                    try:
+                        pages = list(engine.iter_pages(pdf_path, pdf))
+                        stage.count(pages=len(pages))
+                        text = PAGE_BREAK.join(pages)
+                        extract_log.debug("Raw text from %s (%s):\n%s", pdf_path, engine.name, text)
+                        return text
+                    except Exception as e:
+                        extract_log.warning("Could not extract text from %s with %s: %s", pdf_path, engine.name, e)
+                        error = e
+        return f"ERROR: Could not extract text from PDF: {error}"
+
+    @staticmethod
+    def parse_lines(lines: Iterable[str], is_invoice: bool,
+                    layout: Optional[Layout] = None) -> Tuple[ShipToAddress, List[LineItem], bool]:
+        """Run the Ship To and line-item parsers over lines, stopping once both are done
+
+        lines may include PAGE_BREAK markers (see iter_lines). Unless layout is given, the
+        document's layout is detected once from its first lines, which are then parsed with
+        that layout's parsers. Returns (address, items, finished); finished is False when the
+        lines ran out first.
+        """
+        if layout is None:
+            lines = iter(lines)
+            head = LayoutRegistry.head(lines)
+            layout = LayoutRegistry.shared().detect(head, 'SO' if is_invoice else 'PO')
+            extract_log.debug("Layout: %s", layout.name)
+            lines = itertools.chain(head, lines)
+        if profiler.enabled:
+            return PDFExtractor._parse_lines_profiled(lines, is_invoice, layout)
+        ship_to = ShipToParser(layout)
+        line_items = LineItemParser(is_invoice, layout)
+        for line in lines:
+            if line is PAGE_BREAK:
+                line_items.page_break()
+                continue
+            ship_to.feed(line)
+            line_items.feed(line)
+            if ship_to.done and line_items.done:
+                return ship_to.close(), line_items.close(), True
+        return ship_to.close(), line_items.close(), False
+
+    @staticmethod
+    def _parse_lines_profiled(lines: Iterable[str], is_invoice: bool,
+                              layout: Layout) -> Tuple[ShipToAddress, List[LineItem], bool]:
+        """parse_lines, timing each parser separately (only used while profiling)"""
+        parsers = (('ship_to', ShipToParser(layout)), ('line_items', LineItemParser(is_invoice, layout)))
+        spent = {name: [0.0, 0.0, 0] for name, _ in parsers}  # wall, cpu, lines fed
+        finished = False
+        for line in lines:
+            if line is PAGE_BREAK:
+                parsers[1][1].page_break()
+                continue
+            for name, parser in parsers:
+                if parser.done:
+                    continue
+                wall, cpu = time.perf_counter(), time.process_time()
+                parser.feed(line)
+                totals = spent[name]
+                totals[0] += time.perf_counter() - wall
+                totals[1] += time.process_time() - cpu
+                totals[2] += 1
+            if parsers[0][1].done and parsers[1][1].done:
+                finished = True
+                break
+        results = []
+        for name, parser in parsers:
+            wall, cpu = time.perf_counter(), time.process_time()
+            results.append(parser.close())
+            totals = spent[name]
+            profiler.add(name, totals[0] + time.perf_counter() - wall, totals[1] + time.process_time() - cpu,
+                         lines=totals[2])
+        return results[0], results[1], finished
+
+    @staticmethod
+    def parse_document(pdf_path: str, is_invoice: bool, keep_text: bool = False, backend: Optional[str] = None,
+                       ocr: bool = False, cache: Optional["PDFCache"] = None, pdf: Optional[MappedPDF] = None
+                       ) -> Tuple[ShipToAddress, List[LineItem], Optional[str], bool]:
+        """Extract and parse page by page, stopping once the Ship To block and items table are both done
+
+        Returns (address, items, text, complete). Pages after the items table are never
+        extracted; text holds the pages that were read when keep_text is set (None otherwise)
+        and complete says whether that was every page. Backends are tried in backend_chain()
+        order until one's output passes looks_parsed(); the last one's result is used regardless.
+
+        If that result fails looks_parsed() and pages the parsers read had no text layer, the
+        document is a scan: with ocr set it is parsed again with those pages read by Tesseract
+        (see ocr.PageOCR; cache keeps the page text), otherwise ScannedDocumentError is raised.
+
+        pdf is the file already mapped (see pdf_io.MappedPDF), e.g. by a caller that hashed it;
+        otherwise it is mapped here. Either way every engine tried reads the same mapping.
+        """
+        if pdf is None:
+            try:
+                pdf = MappedPDF(pdf_path).open()
+            except OSError as e:
+                raise Exception(f"ERROR: Could not extract text from PDF: {e}")
+            with pdf:
+                return PDFExtractor.parse_document(pdf_path, is_invoice, keep_text, backend, ocr, cache, pdf)
+        chain = backend_chain(backend)
+        scanned = []
+        for n, engine in enumerate(chain):
+            last = n == len(chain) - 1
+            scanned.clear()
+            try:
+                result = PDFExtractor._parse_with(engine, pdf_path, pdf, is_invoice, keep_text, scanned)
+            except Exception as e:
+                extract_log.warning("Could not extract text from %s with %s: %s", pdf_path, engine.name, e)
+                if last:
+                    raise Exception(f"ERROR: Could not extract text from PDF: {e}")
+                continue
+            if looks_parsed(result[0], result[1]):
+                return result
+            if last:
+                break
+            extract_log.info("%s output for %s failed the parse check, falling back", engine.name, pdf_path)
+        if not scanned:
+            return result
+        import ocr as ocr_stage
+        if not ocr or not ocr_stage.available():
+            raise ScannedDocumentError(pdf_path, scanned)
+        with ocr_stage.PageOCR(pdf_path, cache) as reader:
+            result = PDFExtractor._parse_with(engine, pdf_path, pdf, is_invoice, keep_text, ocr=reader)
+        extract_log.info("Parsed %s with OCR (%d page(s) read by Tesseract)", pdf_path, reader.pages_read)
+        return result
+
+    @staticmethod
+    def _parse_with(engine: ExtractorBackend, pdf_path: str, pdf: MappedPDF, is_invoice: bool, keep_text: bool,
+                    scanned: Optional[List[int]] = None,
+                    ocr=None) -> Tuple[ShipToAddress, List[LineItem], Optional[str], bool]:
+        """One parse_document() attempt with one engine
+
+        Pages with no text layer that the parsers read are listed (1-based) in scanned, or,
+        when ocr (an ocr.PageOCR) is given, replaced by its text for them.
+        """
+        kept = [] if keep_text else None
+        pages_read = 0
+        timed = profiler.enabled
+        extract_wall = extract_cpu = 0.0
+
+        def counted(pages):
+            nonlocal pages_read, extract_wall, extract_cpu
+            while True:
+                # Pages are pulled lazily by the parsers, so extraction is timed page by page
+                if timed:
+                    wall, cpu = time.perf_counter(), time.process_time()
+                page = next(pages, None)
+                if timed:
+                    extract_wall += time.perf_counter() - wall
+                    extract_cpu += time.process_time() - cpu
+                if page is None:
+                    return
+                pages_read += 1
+                if len(page) < SCANNED_PAGE_CHARS * 4 and len(page.strip()) < SCANNED_PAGE_CHARS:
+                    if ocr is not None:
+                        with profiler.stage('ocr') as stage:
+                            page = ocr.text(pages_read - 1)
+                            stage.count(pages=1)
+                    elif scanned is not None:
+                        scanned.append(pages_read)
+                if kept is not None:
+                    kept.append(page)
+                yield page
+
+        pages = engine.iter_pages(pdf_path, pdf)
+        try:
+            address, items, finished = PDFExtractor.parse_lines(
+                PDFExtractor.iter_lines(counted(pages), page_breaks=True), is_invoice)
+        finally:
+            pages.close()
+            if timed:
+                profiler.add('extract', extract_wall, extract_cpu, pages=pages_read)
+        extract_log.debug("Parsed %s with %s from %d page(s)", pdf_path, engine.name, pages_read)
+        text = PAGE_BREAK.join(kept) if kept is not None else None
+        return address, items, text, not finished
+
+    @staticmethod
+    def parse_ship_to(text: str, is_invoice: bool = False, layout: Optional[Layout] = None) -> ShipToAddress:
+        """Parse Ship To address from text, handling both SO and PO formats, and skipping vendor blocks"""
+        with profiler.stage('ship_to') as stage:
+            source = PDFExtractor.text_lines(text)
+            if layout is None:
+                head = LayoutRegistry.head(source)
+                layout = LayoutRegistry.shared().detect(head, 'SO' if is_invoice else 'PO')
+                source = itertools.chain(head, source)
+            parser = ShipToParser(layout)
+            lines = 0
+            for line in source:
+                lines += 1
+                parser.feed(line)
+                if parser.done:
+                    break
+            stage.count(lines=lines)
+            return parser.close()
+
+    @staticmethod
+    def parse_line_items(text: str, is_invoice: bool = False, layout: Optional[Layout] = None) -> List[LineItem]:
+        """Parse line items from text for SO and PO tables, extracting only Number, Description, and Qty Ordered. Handles PO two-line items and tables continued across pages."""
+        with profiler.stage('line_items') as stage:
+            source = PDFExtractor.text_lines(text, page_breaks=True)
+            if layout is None:
+                head = LayoutRegistry.head(source)
+                layout = LayoutRegistry.shared().detect(head, 'SO' if is_invoice else 'PO')
+                source = itertools.chain(head, source)
+            parser = LineItemParser(is_invoice, layout)
+            lines = 0
+            for line in source:
+                if line is PAGE_BREAK:
+                    parser.page_break()
+                    continue
+                lines += 1
+                parser.feed(line)
+                if parser.done:
+                    break
+            stage.count(lines=lines)
+            return parser.close()
+
+    @staticmethod
+    def _so_description(sku: str, desc_part: str, qty_prefix: str) -> str:
+        """Clean an SO description: the first line's text after the SKU plus any text before the qty on the second line"""
+        # Remove the exact pattern 'sku+$price' from the end
+        price = SO_TRAILING_PRICE_RE.search(desc_part)
+        if price and desc_part.endswith(sku, 0, price.start()):
+            desc_part = desc_part[:price.start() - len(sku)]
+        # Remove any $price left
+        if '$' in desc_part:
+            desc_part = SO_PRICE_RE.sub('', desc_part)
+        # Remove trailing qty/ea if present
+        tail = SO_QTY_TAIL_RE.search(desc_part)
+        if tail:
+            desc_part = desc_part[:tail.start()]
+        desc = desc_part + ' ' + qty_prefix
+        # Remove any dollar sign and everything after it
+        dollar = desc.find('$')
+        if dollar != -1:
+            desc = desc[:dollar]
+        return ' '.join(desc.split())
+
+    @staticmethod
+    def _po_description(sku: str, desc: str) -> str:
+        """Clean a PO description built from both item lines, making sure it ends with the SKU (size)"""
+        # Remove price (e.g., $15.00, $ 15.00, etc.)
+        if '$' in desc:
+            desc = PO_PRICE_RE.sub('', desc)
+        # Remove trailing quantity info (e.g., '1 ea', '6 ea', etc.)
+        desc = PO_QTY_WORD_RE.sub('', desc)
+        # Remove trailing 'Total Cost' or similar
+        total = TOTAL_COST_RE.search(desc)
+        if total:
+            desc = desc[:total.start()]
+        # Remove any double spaces, then trailing numbers or $ if any remain
+        desc = PDFExtractor._strip_trailing_amounts(' '.join(desc.split()))
+        # Remove any trailing $ and whitespace
+        if desc.endswith('$'):
+            desc = desc[:-1].strip()
+        # Remove 'SKU+qty+unit' (e.g., '350027-M6 ea') if present
+        desc = PDFExtractor._remove_sku_qty(desc, sku).strip()
+        # Ensure description ends with SKU (size)
+        if not desc.rstrip().endswith(sku):
+            desc = ' '.join((desc + ' ' + sku).split())
+        return desc
+
+    @staticmethod
+    def _strip_trailing_amounts(desc: str) -> str:
+        r"""Drop the trailing run of amounts like ' 6 $15.00 90.00', then strip
+
+        Linear-time equivalent of re.sub(r'(\s*\$?\d+[.,\d]*\s*)+$', '', desc): the run may hold
+        whitespace, digits, '.', ',' and '$', every '$' must be followed by a digit, and every
+        group of digits/separators must start with a digit.
+        """
+        cut = len(desc)
+        seen_digit = False
+        k = len(desc) - 1
+        while k >= 0:
+            ch = desc[k]
+            nxt = desc[k+1] if k + 1 < len(desc) else ''
+            if ch in AMOUNT_SEPARATORS:
+                pass
+            elif ch.isspace() or ch == '$':
+                if nxt in AMOUNT_SEPARATORS:
+                    break
+                if ch == '$' and not nxt.isdecimal():
+                    break
+            elif ch.isdecimal():
+                seen_digit = True
+            else:
+                break
+            if seen_digit and ch not in AMOUNT_SEPARATORS:
+                cut = k
+            k -= 1
+        return desc[:cut].strip()
+
+    @staticmethod
+    def _remove_sku_qty(desc: str, sku: str) -> str:
+        """Remove every case-insensitive 'SKU + qty + ea' without compiling a pattern per SKU"""
+        if not (desc.isascii() and sku.isascii()):
+            # Unicode case folding can change lengths; let the regex engine handle the rare case
+            return re.sub(rf'{re.escape(sku)}\d+\s*ea', '', desc, flags=re.IGNORECASE)
+        lower = desc.lower()
+        key = sku.lower()
+        parts = []
+        last = 0
+        pos = lower.find(key)
+        while pos != -1:
+            qty = QTY_EA_RE.match(lower, pos + len(key))
+            if qty:
+                parts.append(desc[last:pos])
+                last = qty.end()
+                pos = lower.find(key, last)
+            else:
+                pos = lower.find(key, pos + 1)
+        if not parts:
+            return desc
+        parts.append(desc[last:])
+        return ''.join(parts)
+
+# Bump whenever extraction or parsing output changes so stale cache entries are ignored
+# (layout and master data file changes are picked up through parser_version())
+PARSER_VERSION = "2"
+
+def parser_version() -> str:
+    """PARSER_VERSION plus the loaded layouts' and master data's digests, for cache and index staleness checks"""
+    version = f"{PARSER_VERSION}.{LayoutRegistry.shared().digest}"
+    # Known vendors change which Ship To blocks are rejected
+    master = MasterData.shared().digest
+    return f"{version}.{master}" if master else version
+
+class PDFCache:
+    """On-disk SQLite cache of extracted text and parsed results, keyed by file content hash"""
+
+    DEFAULT_PATH = Path(__file__).with_name(".matcher_cache.sqlite3")
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    # A hit only refreshes an entry's last_used once it is this many seconds old, so reads rarely write
+    TOUCH_INTERVAL = 60.0
+    # Other processes add entries too, so the stored size is summed again after this many of ours
+    EVICT_CHECK_EVERY = 32
+    _shared = {}
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = str(path or self.DEFAULT_PATH)
+        self.max_bytes = max_bytes
+        # Several worker processes may share the file, so wait on locks instead of failing
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " key TEXT PRIMARY KEY, text TEXT NOT NULL, parsed TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_used REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS documents_last_used ON documents(last_used)")
+        self._conn.commit()
+        # Writes held back until the end of a batch(): key -> (text, parsed JSON, size), and keys hit
+        self._pending = {}
+        self._touched = set()
+        self._batch_depth = 0
+        self._total = None        # bytes stored, as of the last sum plus what this process has added
+        self._inserts = 0         # entries added since the last sum
+
+    @classmethod
+    def shared(cls, path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> "PDFCache":
+        """Return one cache per database file per process (connections can't cross processes)"""
+        key = str(path or cls.DEFAULT_PATH)
+        if key not in cls._shared:
+            cls._shared[key] = cls(key, max_bytes)
+        return cls._shared[key]
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        """SHA-256 hex digest of the file bytes"""
+        return pdf_io.file_hash(path)
+
+    @staticmethod
+    def file_key(path: str, backend: str = "", pdf: Optional[MappedPDF] = None) -> str:
+        """SHA-256 of the file bytes plus the parser version and backend choice
+
+        pdf, the file already mapped, is hashed instead of reading the file again.
+        """
+        digest = pdf.sha256() if pdf is not None else PDFCache.file_hash(path)
+        return f"{digest}:{parser_version()}:{backend}"
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Hold back writes (new entries, last_used updates) and make them in one commit at the end
+
+        Used around everything one document reads and writes; batches may nest.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.flush()
+
+    def get(self, key: str) -> Optional[Tuple[str, dict]]:
+        """Return (text, parsed) for key and mark it recently used, or None on a miss"""
+        if key in self._pending:
+            text, parsed_json, _ = self._pending[key]
+            return text, json.loads(parsed_json)
+        row = self._conn.execute("SELECT text, parsed, last_used FROM documents WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if time.time() - row[2] > self.TOUCH_INTERVAL:
+            self._touched.add(key)
+            if not self._batch_depth:
+                self.flush()
+        return row[0], json.loads(row[1])
+
+    def put(self, key: str, text: str, parsed: dict):
+        """Store text and parsed results for key, then evict least recently used entries over the size limit"""
+        parsed_json = json.dumps(parsed)
+        self._pending[key] = (text, parsed_json, len(text.encode('utf-8')) + len(parsed_json))
+        if not self._batch_depth:
+            self.flush()
+
+    def flush(self):
+        """Write held-back entries and last_used updates in one commit, evicting when the cache may be over size"""
+        if not self._pending and not self._touched:
+            return
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents (key, text, parsed, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                [(key, text, parsed_json, size, now) for key, (text, parsed_json, size) in self._pending.items()])
+            self._conn.executemany("UPDATE documents SET last_used = ? WHERE key = ?",
+                                   [(now, key) for key in self._touched - self._pending.keys()])
+        if self._total is not None:
+            self._total += sum(size for _, _, size in self._pending.values())
+        self._inserts += len(self._pending)
+        self._pending.clear()
+        self._touched.clear()
+        if self._total is None or self._total > self.max_bytes or self._inserts >= self.EVICT_CHECK_EVERY:
+            self.evict()
+
+    def get_page(self, key: str) -> Optional[str]:
+        """OCR text stored under a page image hash, or None"""
+        hit = self.get(f"ocr:{key}")
+        return hit[0] if hit is not None else None
+
+    def put_page(self, key: str, text: str):
+        """Keep the OCR text of a page; it is evicted like any other entry"""
+        self.put(f"ocr:{key}", text, {})
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+        self._total, self._inserts = total, 0
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM documents ORDER BY last_used").fetchall()
+        doomed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM documents WHERE key = ?", doomed)
+        self._conn.commit()
+        self._total = total
+
+    def invalidate(self, paths: Optional[Iterable[str]] = None) -> int:
+        """Remove entries for the given files, or everything if no files are given; returns rows removed"""
+        if paths is None:
+            removed = self._conn.execute("DELETE FROM documents").rowcount
+        else:
+            hashes = [self.file_hash(p) for p in paths]
+            removed = sum(self._conn.execute("DELETE FROM documents WHERE key LIKE ?", (h + ':%',)).rowcount
+                          for h in hashes)
+        self._conn.commit()
+        return removed
+
+    def stats(self) -> dict:
+        """Return entry count and total size"""
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM documents").fetchone()
+        return {'path': self.path, 'entries': count, 'bytes': total, 'max_bytes': self.max_bytes}
+
+def _parsed_to_dict(address: ShipToAddress, items: List[LineItem]) -> dict:
+    return {'address': asdict(address), 'items': [asdict(item) for item in items]}
+
+def _parsed_from_dict(data: dict) -> Tuple[ShipToAddress, List[LineItem]]:
+    return ShipToAddress(**data['address']), [LineItem(**item) for item in data['items']]
+
+def _fingerprint(item: LineItem) -> tuple:
+    return item.sku, item.description, item.qty
+
+@dataclass(frozen=True, slots=True)
+class LineComparison:
+    """One aligned SO/PO line-item row and how each of its values compared"""
+    so: LineItem
+    po: LineItem
+    sku_status: Status
+    desc_status: Status
+    qty_status: Status
+
+    @property
+    def worst(self) -> Status:
+        return max(self.sku_status, self.desc_status, self.qty_status)
+
+    def to_dict(self) -> dict:
+        """JSON form used in batch, service and watch results"""
+        return {'so': asdict(self.so), 'po': asdict(self.po), 'sku_status': self.sku_status.label,
+                'desc_status': self.desc_status.label, 'qty_status': self.qty_status.label}
+
+@dataclass
+class ComparisonDiff:
+    """What changed between two successive DocumentMatcher.compare() calls"""
+    fields: dict = field(default_factory=dict)           # field -> (old status, new status), if it changed
+    added: list = field(default_factory=list)            # LineComparison rows new in this comparison
+    removed: list = field(default_factory=list)          # rows no longer present
+    changed: list = field(default_factory=list)          # (old row, new row) with the same SKUs
+    issues_added: List[str] = field(default_factory=list)
+    issues_resolved: List[str] = field(default_factory=list)
+    recomputed: int = 0                                  # rows scored this time rather than reused
+
+    @property
+    def unchanged(self) -> bool:
+        return not (self.fields or self.added or self.removed or self.changed)
+
+class DocumentMatcher:
+    """Compare SO and PO documents"""
+
+    def __init__(self, cache: Optional[PDFCache] = None, backend: Optional[str] = None,
+                 thresholds: Optional[dict] = None, ocr: bool = False):
+        self.cache = cache
+        self.backend = backend
+        # Read scanned documents with Tesseract instead of raising ScannedDocumentError
+        self.ocr = ocr
+        # Per-field similarity above which a mismatch is 'close' (yellow) rather than red
+        self.thresholds = similarity.field_thresholds(thresholds)
+        # Inputs and results of the previous compare(), so a re-compare after one side is
+        # reloaded only rescores the fields and rows whose values changed
+        self._prev_fields = {}     # field -> (so value, po value, status)
+        self._prev_rows = {}       # (so fingerprint, po fingerprint) -> rows, one per duplicate
+        self._prev_alignment = None
+        self._prev_issues = []
+        self._prev_thresholds = dict(self.thresholds)
+        # ComparisonDiff against the previous compare(); None when there is nothing to diff against
+        # (the first compare, the first after a threshold change, or one without both addresses)
+        self.last_diff = None
+        self.so_path = None
+        self.po_path = None
+        self.so_address = None
+        self.po_address = None
+        self.so_items = []
+        self.po_items = []
+
+    def _load(self, path: str, is_invoice: bool) -> Tuple[ShipToAddress, List[LineItem]]:
+        """Extract and parse a document, going through the cache when one is configured"""
+        with profiler.stage('load') as stage:
+            address, items = self._load_parsed(path, is_invoice)
+            # Worked out once here; every later compare() looks the key up
+            addresses.canonical_key(address)
+            stage.count(items=len(items))
+            return address, items
+
+    def _load_parsed(self, path: str, is_invoice: bool) -> Tuple[ShipToAddress, List[LineItem]]:
+        if self.cache is None:
+            address, items, _, _ = PDFExtractor.parse_document(path, is_invoice, backend=self.backend, ocr=self.ocr)
+            return address, items
+        # Hashed and parsed from one mapping, so a miss reads the file from disk only once
+        with MappedPDF(path) as pdf:
+            return self._load_cached(path, is_invoice, pdf)
+
+    def _load_cached(self, path: str, is_invoice: bool, pdf: MappedPDF) -> Tuple[ShipToAddress, List[LineItem]]:
+        # One commit for the document's entry, its OCR'd pages and the last_used updates
+        with self.cache.batch():
+            kind = 'so' if is_invoice else 'po'
+            key = PDFCache.file_key(path, backend_preference(self.backend), pdf)
+            hit = self.cache.get(key)
+            if hit is not None:
+                text, parsed = hit
+                if kind in parsed:
+                    return _parsed_from_dict(parsed[kind])
+                # Cached text may stop after the pages the other parse needed; it is enough
+                # if it covers the whole document or this parse finishes inside it
+                address, items, finished = PDFExtractor.parse_lines(PDFExtractor.text_lines(text, page_breaks=True),
+                                                                     is_invoice)
+                if finished or parsed.get('complete'):
+                    parsed[kind] = _parsed_to_dict(address, items)
+                    self.cache.put(key, text, parsed)
+                    return address, items
+            address, items, text, complete = PDFExtractor.parse_document(path, is_invoice, keep_text=True,
+                                                                         backend=self.backend, ocr=self.ocr,
+                                                                         cache=self.cache, pdf=pdf)
+            parsed = hit[1] if hit is not None else {}
+            parsed[kind] = _parsed_to_dict(address, items)
+            parsed['complete'] = complete
+            self.cache.put(key, text, parsed)
+            return address, items
+
+    def customer_ids(self) -> Tuple[Optional[str], Optional[str]]:
+        """(SO, PO) master data customer ids of the loaded ship-to addresses; None where unknown"""
+        master = MasterData.shared()
+        return (master.customer_id(self.so_address) if self.so_address else None,
+                master.customer_id(self.po_address) if self.po_address else None)
+
+    def load_so(self, path: str):
+        """Load and parse Sales Order"""
+        self.so_address, self.so_items = self._load(path, is_invoice=True)
+        self.so_path = path
+
+    def load_po(self, path: str):
+        """Load and parse Purchase Order"""
+        self.po_address, self.po_items = self._load(path, is_invoice=False)
+        self.po_path = path
+    
+    def compare(self) -> Tuple[bool, List[str], dict, list]:
+        """Compare SO and PO, return (match: bool, issues: List[str], field_status: dict, lineitem_status: list)
+
+        field_status maps each address field to a Status; lineitem_status holds one LineComparison per row.
+        """
+        with profiler.stage('compare') as stage:
+            stage.count(items=len(self.so_items) + len(self.po_items))
+            return self._compare()
+
+    def _compare(self) -> Tuple[bool, List[str], dict, list]:
+        if not self.so_address or not self.po_address:
+            self.last_diff = None
+            return False, ["Missing address data"], {}, []
+
+        issues = []
+        field_status = {}
+        lineitem_status = []  # LineComparison for each aligned row
+        diff = ComparisonDiff()
+
+        def fuzzy_status(a, b, name):
+            return similarity.status(a, b, self.thresholds[name])
+
+        # Statuses remembered under other thresholds can't be reused
+        if self.thresholds != self._prev_thresholds:
+            self._prev_fields, self._prev_rows = {}, {}
+            self._prev_thresholds = dict(self.thresholds)
+
+        # Compare addresses: fields equal once normalized (abbreviations, case, ZIP+4) are green,
+        # and only those that still differ are fuzzy-scored, on their normalized forms
+        so_key = addresses.canonical_key(self.so_address)
+        po_key = addresses.canonical_key(self.po_address)
+        same = so_key == po_key
+        # Both names resolving to the same known customer settles the name, whatever the spelling
+        so_customer, po_customer = self.customer_ids()
+        same_customer = so_customer is not None and so_customer == po_customer
+        fields = [
+            ('name', 'Ship To Name', self.so_address.name, self.po_address.name),
+            ('address', 'Ship To Address', self.so_address.address, self.po_address.address),
+            ('city', 'Ship To City', self.so_address.city, self.po_address.city),
+            ('state', 'Ship To State', self.so_address.state, self.po_address.state),
+            ('zip_code', 'Ship To Zip', self.so_address.zip_code, self.po_address.zip_code),
+        ]
+        prev_fields = self._prev_fields
+        self._prev_fields = {}
+        for n, (key, label, so_val, po_val) in enumerate(fields):
+            prev = prev_fields.get(key)
+            if prev and prev[:2] == (so_val, po_val):
+                status = prev[2]
+            elif same or so_key[n] == po_key[n] or (same_customer and key == 'name'):
+                status = Status.GREEN
+            else:
+                status = fuzzy_status(so_key[n], po_key[n], key)
+            field_status[key] = status
+            self._prev_fields[key] = (so_val, po_val, status)
+            if prev and prev[2] != status:
+                diff.fields[key] = (prev[2], status)
+            if status == Status.RED:
+                issues.append(f"{label}: SO='{so_val}' vs PO='{po_val}'")
+            elif status == Status.YELLOW:
+                issues.append(f"{label} (close): SO='{so_val}' vs PO='{po_val}'")
+
+        # Pair line items: unique exact SKUs directly, the rest by optimal assignment on
+        # SKU/description/qty similarity, so near-miss and duplicate SKUs share a row.
+        # Unchanged item lists keep the previous pairing.
+        so_fps = [_fingerprint(item) for item in self.so_items]
+        po_fps = [_fingerprint(item) for item in self.po_items]
+        if self._prev_alignment is not None and self._prev_alignment[:2] == (so_fps, po_fps):
+            alignment = self._prev_alignment[2]
+        else:
+            alignment = align_items(self.so_items, self.po_items)
+        self._prev_alignment = (so_fps, po_fps, alignment)
+
+        prev_rows = self._prev_rows
+        self._prev_rows = defaultdict(list)
+        unmatched = []            # rows with no previous row of the same values
+        catalog = SkuCatalog.shared()
+        for so_idx, po_idx in alignment:
+            if po_idx is None:
+                so_item = self.so_items[so_idx]
+                po_item = LineItem(sku=so_item.sku)
+            elif so_idx is None:
+                po_item = self.po_items[po_idx]
+                so_item = LineItem(sku=po_item.sku)
+            else:
+                so_item = self.so_items[so_idx]
+                po_item = self.po_items[po_idx]
+            row_key = (_fingerprint(so_item), _fingerprint(po_item))
+            # Duplicate rows each take one of the previous rows with their values
+            row = prev_rows[row_key].pop(0) if prev_rows.get(row_key) else None
+            if row is not None and (row.so is not so_item or row.po is not po_item):
+                # Same values, but the items may have moved (page/line): keep the scores, not the positions
+                row = replace(row, so=so_item, po=po_item)
+            if row is None:
+                # Only rows whose SO or PO values changed are scored again
+                diff.recomputed += 1
+                row = LineComparison(
+                    so_item, po_item,
+                    sku_status=fuzzy_status(so_item.sku, po_item.sku, 'sku'),
+                    desc_status=fuzzy_status(so_item.description, po_item.description, 'description'),
+                    qty_status=Status.GREEN if so_item.qty == po_item.qty and so_item.qty != 0 else Status.RED,
+                )
+                unmatched.append(row)
+            self._prev_rows[row_key].append(row)
+            lineitem_status.append(row)
+            if row.sku_status == Status.RED:
+                issues.append(f"SKU: SO='{so_item.sku}' vs PO='{po_item.sku}'")
+            elif row.sku_status == Status.YELLOW:
+                issues.append(f"SKU (close): SO='{so_item.sku}' vs PO='{po_item.sku}'")
+            if row.desc_status == Status.RED:
+                issues.append(f"Desc: SO='{so_item.description}' vs PO='{po_item.description}'")
+            if row.qty_status == Status.RED:
+                issues.append(f"Qty: SO={so_item.qty} vs PO={po_item.qty}")
+            if catalog:
+                issues.extend(_catalog_issues(catalog, so_item, po_item,
+                                              lambda a, b: fuzzy_status(a, b, 'description')))
+
+        if prev_fields:
+            # Previous rows left over were removed or changed; a new row with the same SKUs as one
+            # of them is a change to it, in order when several rows share those SKUs
+            removed = defaultdict(deque)
+            for rows in prev_rows.values():
+                for row in rows:
+                    removed[(row.so.sku, row.po.sku)].append(row)
+            for row in unmatched:
+                olds = removed.get((row.so.sku, row.po.sku))
+                if olds:
+                    diff.changed.append((olds.popleft(), row))
+                else:
+                    diff.added.append(row)
+            diff.removed = [row for rows in removed.values() for row in rows]
+            previous = set(self._prev_issues)
+            current = set(issues)
+            diff.issues_added = [issue for issue in issues if issue not in previous]
+            diff.issues_resolved = [issue for issue in self._prev_issues if issue not in current]
+            self.last_diff = diff
+        else:
+            self.last_diff = None
+        self._prev_issues = issues
+        return len(issues) == 0, issues, field_status, lineitem_status
+
+def _catalog_issues(catalog: SkuCatalog, so_item: LineItem, po_item: LineItem, desc_status) -> List[str]:
+    """Issues for one row against the catalog
+
+    A SKU the catalog doesn't know is reported with the SKUs it may have meant. For a known
+    SKU, a description that desc_status(description, catalog description) scores RED is reported
+    (a missing description is already a Desc issue).
+    """
+    issues = []
+    same_sku = so_item.sku == po_item.sku
+    for label, sku in [('SO/PO', so_item.sku)] if same_sku else [('SO', so_item.sku), ('PO', po_item.sku)]:
+        if not sku or sku in catalog:
+            continue
+        suggestions = catalog.suggest(sku)
+        hint = f" (did you mean {', '.join(suggestions)}?)" if suggestions else ""
+        issues.append(f"SKU not in catalog: {label}='{sku}'{hint}")
+    # PO descriptions end with the SKU (see LineItemParser); the catalog's don't
+    so_desc, po_desc = (item.description[:-len(item.sku)].rstrip()
+                        if item.sku and item.description.endswith(item.sku) else item.description
+                        for item in (so_item, po_item))
+    if same_sku and so_desc == po_desc:
+        sides = [('SO/PO', so_item.sku, so_desc)]
+    else:
+        sides = [('SO', so_item.sku, so_desc), ('PO', po_item.sku, po_desc)]
+    for label, sku, description in sides:
+        expected = catalog.description(sku) if sku else None
+        if expected and description and desc_status(description, expected) == Status.RED:
+            issues.append(f"Desc not as in catalog: {label}='{description}' vs catalog='{expected}' ({sku})")
+    return issues
+
+def load_document(path: str, is_invoice: bool, cache_path: Optional[str] = None,
+                  cache_size: int = PDFCache.DEFAULT_MAX_BYTES, ocr: bool = False) -> Tuple[ShipToAddress, List[LineItem]]:
+    """Extract and parse one document (runs in a worker process for the GUI)"""
+    cache = PDFCache.shared(cache_path, cache_size) if cache_path else None
+    return DocumentMatcher(cache=cache, ocr=ocr)._load(path, is_invoice)
+
+_parsed_matcher = None
+
+def compare_parsed(so: Tuple[ShipToAddress, List[LineItem]], po: Tuple[ShipToAddress, List[LineItem]],
+                   thresholds: Optional[dict] = None) -> Tuple[bool, List[str], dict, list]:
+    """DocumentMatcher.compare on already-parsed documents (runs in a worker process for the GUI)
+
+    Each worker keeps its matcher, so re-comparing after one file is replaced only rescores what changed
+    (the GUI sends every comparison to the same worker).
+    """
+    global _parsed_matcher
+    if _parsed_matcher is None or (thresholds and similarity.field_thresholds(thresholds) != _parsed_matcher.thresholds):
+        _parsed_matcher = DocumentMatcher(thresholds=thresholds)
+    matcher = _parsed_matcher
+    matcher.so_address, matcher.so_items = so
+    matcher.po_address, matcher.po_items = po
+    return matcher.compare()
+
+# --- Headless batch mode ---
+# File names look like 'SO-L029638-Customer-...' and 'PO-KS2013442AIR-Customer-...'
+ORDER_FILE_RE = re.compile(r'^(SO|PO)[-_ ]*([A-Za-z0-9]+)', re.IGNORECASE)
+# Runs of letters and digits in a PO's name or text; an SO number must be a whole run, so L12345 doesn't match L123456
+ORDER_WORD_RE = re.compile(r'[A-Z0-9]+')
+
+def order_number(path: str) -> Tuple[str, str]:
+    """Return (kind, order number) from an SO-/PO- file name, or ('', '') if it doesn't follow the convention"""
+    match = ORDER_FILE_RE.match(Path(path).name)
+    if not match:
+        return '', ''
+    return match.group(1).upper(), match.group(2).upper()
+
+def _find_so_references(po_path: str, so_numbers: List[str]) -> List[str]:
+    """Return the SO numbers mentioned in the text of a PO (runs in a worker process)"""
+    text = PDFExtractor.extract_text(po_path)
+    if text.startswith("ERROR"):
+        return []
+    words = set(ORDER_WORD_RE.findall(text.upper()))
+    return [number for number in so_numbers if number in words]
+
+def pair_documents(folder: str, workers: Optional[int] = None) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """Pair every PO under folder with its SO by order number, return (pairs, unpaired files)
+
+    A PO is paired with an SO when it carries the same order number, when the SO number
+    appears in the PO file name, or when the SO number appears in the PO text. Anything
+    still unpaired falls back to folder layout: a directory holding exactly one SO and
+    one PO is treated as a pair. One SO may pair with several PO revisions.
+    """
+    so_files = {}
+    po_files = []
+    others = []
+    for path in sorted(Path(folder).rglob('*')):
+        if not path.is_file() or path.suffix.lower() != '.pdf':
+            continue
+        kind, number = order_number(str(path))
+        if kind == 'SO':
+            so_files.setdefault(number, str(path))
+        elif kind == 'PO':
+            po_files.append(str(path))
+        else:
+            others.append(str(path))
+
+    pairs = []
+    paired_so = set()
+    pending = []
+    for po_path in po_files:
+        _, po_number = order_number(po_path)
+        po_words = set(ORDER_WORD_RE.findall(Path(po_path).stem.upper()))
+        so_number = po_number if po_number in so_files else next(
+            (number for number in so_files if number in po_words), None)
+        if so_number:
+            pairs.append((so_files[so_number], po_path))
+            paired_so.add(so_number)
+        else:
+            pending.append(po_path)
+
+    # Search PO text for SO numbers; extraction is CPU-bound so it goes through the pool too
+    if pending and so_files:
+        still_pending = []
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers, initializer=configure_logging) as pool:
+            refs = pool.map(_find_so_references, pending, [list(so_files)] * len(pending))
+            for po_path, found in zip(pending, refs):
+                if found:
+                    pairs.append((so_files[found[0]], po_path))
+                    paired_so.add(found[0])
+                else:
+                    still_pending.append(po_path)
+        pending = still_pending
+
+    # Fall back to one-pair-per-directory layouts
+    unpaired_so = [(number, path) for number, path in so_files.items() if number not in paired_so]
+    for number, so_path in unpaired_so:
+        so_dir = Path(so_path).parent
+        same_dir_so = [p for _, p in unpaired_so if Path(p).parent == so_dir]
+        same_dir_po = [p for p in pending if Path(p).parent == so_dir]
+        if len(same_dir_so) == 1 and len(same_dir_po) == 1:
+            pairs.append((so_path, same_dir_po[0]))
+            paired_so.add(number)
+            pending.remove(same_dir_po[0])
+
+    unpaired = [path for number, path in so_files.items() if number not in paired_so] + pending + others
+    return pairs, unpaired
+
+# --- Order index ---
+# Tokens in a PO (name or text) that could be an SO number: letters/digits with at least one digit
+ORDER_TOKEN_RE = re.compile(r'\b(?=[A-Z0-9]*\d)[A-Z0-9]{5,}\b')
+
+def _index_version() -> str:
+    """parser_version() plus the address normalization version, since both shape what the index stores"""
+    return f"{parser_version()}.{addresses.KEY_VERSION}"
+
+def _index_document(path: str, known_hash: Optional[str] = None) -> dict:
+    """Hash and parse one PDF for the order index (runs in a worker process)
+
+    When the content hash equals known_hash the file was only touched, so parsing is skipped.
+    """
+    kind, number = order_number(path)
+    stat = os.stat(path)
+    # Hashed and parsed from one mapping, so the file is read from disk only once
+    with MappedPDF(path) as pdf:
+        entry = {'path': path, 'kind': kind, 'number': number, 'mtime': stat.st_mtime, 'size': stat.st_size,
+                 'sha': pdf.sha256(), 'name': '', 'zip_code': '', 'refs': [], 'error': None}
+        if entry['sha'] == known_hash:
+            entry['unchanged'] = True
+            return entry
+        refs = set(ORDER_TOKEN_RE.findall(Path(path).stem.upper()))
+        try:
+            address, _, text, _ = PDFExtractor.parse_document(path, kind == 'SO', keep_text=True, pdf=pdf)
+            # Stored canonical, so ship-to pairing ignores case, punctuation and ZIP+4
+            entry['name'] = addresses.normalize('name', address.name)
+            entry['zip_code'] = addresses.normalize('zip_code', address.zip_code)
+            if kind != 'SO':
+                refs.update(ORDER_TOKEN_RE.findall(text.upper()))
+        except Exception as e:
+            entry['error'] = str(e)
+    refs.discard(number)
+    entry['refs'] = sorted(refs)
+    return entry
+
+class OrderIndex:
+    """Persistent SQLite index of SO/PO numbers, ship-to name and ZIP for pairing large folders
+
+    Files are re-read only when their mtime or size changes, and re-parsed only when their
+    content hash changes too, so updating an indexed inbox costs a stat per file.
+    """
+
+    DEFAULT_PATH = Path(__file__).with_name(".matcher_index.sqlite3")
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = str(path or self.DEFAULT_PATH)
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS orders ("
+            " path TEXT PRIMARY KEY, kind TEXT NOT NULL, number TEXT NOT NULL, name TEXT NOT NULL,"
+            " zip_code TEXT NOT NULL, mtime REAL NOT NULL, size INTEGER NOT NULL, sha TEXT NOT NULL,"
+            " parser TEXT NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS orders_number ON orders(kind, number)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS orders_ship_to ON orders(kind, zip_code, name)")
+        # Candidate SO numbers found in each PO's file name and text
+        self._conn.execute("CREATE TABLE IF NOT EXISTS refs (path TEXT NOT NULL, token TEXT NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS refs_path ON refs(path)")
+        self._conn.commit()
+
+    def update(self, folder: str, workers: Optional[int] = None) -> dict:
+        """Bring the index up to date with every PDF under folder; returns counts of what changed"""
+        root = Path(folder).resolve()
+        prefix = str(root) + os.sep
+        indexed = [row[0] for row in self._conn.execute(
+            "SELECT path FROM orders WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))]
+        files = [str(p) for p in root.rglob('*') if p.is_file() and p.suffix.lower() == '.pdf']
+        counts = self.index_files(files, workers)
+        present = set(files)
+        gone = [(path,) for path in indexed if path not in present]
+        self._conn.executemany("DELETE FROM orders WHERE path = ?", gone)
+        self._conn.executemany("DELETE FROM refs WHERE path = ?", gone)
+        self._conn.commit()
+        counts['removed'] = len(gone)
+        return counts
+
+    def index_files(self, paths: Iterable[str], workers: Optional[int] = None,
+                    pool: Optional["ProcessPoolExecutor"] = None) -> dict:
+        """Add or refresh the given PDFs, skipping any whose mtime and size are unchanged
+
+        Parsing runs on pool when one is given (e.g. a long-running watcher's), otherwise on a new one.
+        """
+        counts = {'scanned': 0, 'added': 0, 'updated': 0, 'touched': 0, 'unchanged': 0, 'removed': 0, 'failed': 0}
+        todo = []
+        version = _index_version()
+        for path in paths:
+            path = str(Path(path).resolve())
+            counts['scanned'] += 1
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                # Missing, or removed since the folder was scanned
+                log.warning("Cannot index %s: %s", path, e)
+                counts['failed'] += 1
+                continue
+            old = self._conn.execute("SELECT mtime, size, sha, parser FROM orders WHERE path = ?", (path,)).fetchone()
+            if old and old[0] == stat.st_mtime and old[1] == stat.st_size and old[3] == version:
+                counts['unchanged'] += 1
+                continue
+            # A parser upgrade means re-parsing even if the bytes are the same
+            todo.append((path, old[2] if old and old[3] == version else None, old is not None))
+        if not todo:
+            return counts
+
+        own_pool = pool is None
+        if own_pool:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=configure_logging)
+        try:
+            futures = {pool.submit(_index_document, path, sha): existed for path, sha, existed in todo}
+            for future in as_completed(futures):
+                try:
+                    entry = future.result()
+                except OSError:
+                    counts['failed'] += 1
+                    continue  # removed or unreadable since the scan
+                if entry.get('unchanged'):
+                    self._conn.execute("UPDATE orders SET mtime = ?, size = ? WHERE path = ?",
+                                       (entry['mtime'], entry['size'], entry['path']))
+                    counts['touched'] += 1
+                    continue
+                self._store(entry)
+                counts['updated' if futures[future] else 'added'] += 1
+                if entry['error']:
+                    counts['failed'] += 1
+        finally:
+            if own_pool:
+                pool.shutdown()
+        self._conn.commit()
+        return counts
+
+    def _store(self, entry: dict):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO orders (path, kind, number, name, zip_code, mtime, size, sha, parser)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (entry['path'], entry['kind'], entry['number'], entry['name'], entry['zip_code'],
+             entry['mtime'], entry['size'], entry['sha'], _index_version()))
+        self._conn.execute("DELETE FROM refs WHERE path = ?", (entry['path'],))
+        self._conn.executemany("INSERT INTO refs (path, token) VALUES (?, ?)",
+                               [(entry['path'], token) for token in entry['refs']])
+
+    def find_so(self, po_path: str) -> Optional[str]:
+        """SO for an indexed PO: same order number, an SO number in its name or text, then same ship-to"""
+        row = self._conn.execute("SELECT number, name, zip_code FROM orders WHERE path = ?",
+                                 (str(Path(po_path).resolve()),)).fetchone()
+        if row is None:
+            return None
+        number, name, zip_code = row
+        queries = [
+            ("SELECT path FROM orders WHERE kind = 'SO' AND number = ? ORDER BY mtime DESC LIMIT 1", (number,)),
+            ("SELECT o.path FROM refs r JOIN orders o ON o.kind = 'SO' AND o.number = r.token"
+             " WHERE r.path = ? ORDER BY o.mtime DESC LIMIT 1", (str(Path(po_path).resolve()),)),
+        ]
+        if name and zip_code:
+            queries.append(("SELECT path FROM orders WHERE kind = 'SO' AND zip_code = ? AND name = ?"
+                            " ORDER BY mtime DESC LIMIT 1", (zip_code, name)))
+        for sql, params in queries:
+            if params[0]:
+                found = self._conn.execute(sql, params).fetchone()
+                if found:
+                    return found[0]
+        return None
+
+    def pairs(self, po_paths: Optional[Iterable[str]] = None) -> Tuple[List[Tuple[str, str]], List[str]]:
+        """Pair the given POs (default: every indexed PO), return (pairs, POs with no SO found)"""
+        if po_paths is None:
+            po_paths = [row[0] for row in self._conn.execute("SELECT path FROM orders WHERE kind = 'PO' ORDER BY path")]
+        pairs = []
+        unpaired = []
+        for po_path in po_paths:
+            so_path = self.find_so(po_path)
+            if so_path:
+                pairs.append((so_path, str(Path(po_path).resolve())))
+            else:
+                unpaired.append(po_path)
+        return pairs, unpaired
+
+    def stats(self) -> dict:
+        """Return indexed document counts"""
+        counts = dict(self._conn.execute("SELECT kind, COUNT(*) FROM orders GROUP BY kind").fetchall())
+        return {'path': self.path, 'so': counts.get('SO', 0), 'po': counts.get('PO', 0),
+                'other': sum(n for kind, n in counts.items() if kind not in ('SO', 'PO'))}
+
+def read_manifest(manifest: str) -> List[Tuple[str, str]]:
+    """Read (so, po) pairs from a CSV manifest with 'so' and 'po' columns; relative paths resolve against the manifest's folder"""
+    base = Path(manifest).parent
+    pairs = []
+    with open(manifest, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            so = (row.get('so') or '').strip()
+            po = (row.get('po') or '').strip()
+            if so and po:
+                pairs.append((str(base / so), str(base / po)))
+    return pairs
+
+def compare_pair(so_path: str, po_path: str, cache_path: Optional[str] = None,
+                 cache_size: int = PDFCache.DEFAULT_MAX_BYTES, ocr: bool = False) -> dict:
+    """Load and compare one SO/PO pair, returning a JSON-serialisable result (runs in a worker process)
+
+    Without ocr, a scanned document gives an error result with 'scanned' set, so the caller
+    can send the pair to an OCR pool (compare_pair again with ocr=True) without holding up
+    this one.
+    """
+    result = {'so': so_path, 'po': po_path, 'match': False, 'issues': [],
+              'field_status': {}, 'line_items': [], 'error': None}
+    profiler.reset()
+    # Results go to stdout as JSONL; anything a worker prints (a PDF library, say) must not land there
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            cache = PDFCache.shared(cache_path, cache_size) if cache_path else None
+            matcher = DocumentMatcher(cache=cache, ocr=ocr)
+            matcher.load_so(so_path)
+            matcher.load_po(po_path)
+            match, issues, field_status, lineitem_status = matcher.compare()
+            result.update(match=match, issues=issues,
+                          field_status={key: status.label for key, status in field_status.items()})
+            result['so_address'] = asdict(matcher.so_address)
+            result['po_address'] = asdict(matcher.po_address)
+            if MasterData.shared().customers:
+                result['customer'] = dict(zip(('so', 'po'), matcher.customer_ids()))
+            result['line_items'] = [row.to_dict() for row in lineitem_status]
+        except ScannedDocumentError as e:
+            result['error'] = str(e)
+            result['scanned'] = True
+        except Exception as e:
+            result['error'] = str(e)
+    if profiler.enabled:
+        result['profile'] = profiler.report()
+    return result
+
+def format_histograms(samples: dict) -> str:
+    """Per-stage wall-time percentiles and a log2-bucketed histogram, from stage -> list of ms"""
+    lines = []
+    for name in sorted(samples, key=lambda n: PROFILE_STAGES.index(n) if n in PROFILE_STAGES else len(PROFILE_STAGES)):
+        values = sorted(samples[name])
+        if not values:
+            continue
+
+        def pct(p):
+            return values[min(len(values) - 1, int(p * len(values)))]
+
+        lines.append(f"{name}: n={len(values)} p50={pct(0.5):.1f}ms p90={pct(0.9):.1f}ms "
+                     f"p99={pct(0.99):.1f}ms max={values[-1]:.1f}ms")
+        buckets = {}
+        for value in values:
+            # Bucket k holds [2^(k-1), 2^k) ms; everything under 1 ms lands in bucket 0
+            bucket = max(0, math.ceil(math.log2(value))) if value > 1 else 0
+            buckets[bucket] = buckets.get(bucket, 0) + 1
+        widest = max(buckets.values())
+        for bucket in range(min(buckets), max(buckets) + 1):
+            count = buckets.get(bucket, 0)
+            bar = '#' * (math.ceil(40 * count / widest) if count else 0)
+            lines.append(f"  <{2 ** bucket:>7} ms {count:6} {bar}")
+    return "\n".join(lines)
+
+CSV_FIELDS = ['so', 'po', 'match', 'issue_count', 'issues', 'error']
+
+def default_ocr_workers() -> int:
+    """One OCR worker when Tesseract is usable here, otherwise none"""
+    import ocr as ocr_stage
+    return 1 if ocr_stage.available() else 0
+
+def run_batch(pairs: List[Tuple[str, str]], output, fmt: str = 'jsonl', workers: Optional[int] = None,
+              cache_path: Optional[str] = None, cache_size: int = PDFCache.DEFAULT_MAX_BYTES,
+              lines=None, ocr_workers: Optional[int] = None, prefetch: int = pdf_io.PREFETCH_FILES) -> dict:
+    """Compare pairs across a process pool and stream results to the open output file as they finish
+
+    lines, when given, is a results_export.LineResultsWriter that also receives every line-item row.
+    Pairs with a scanned document are passed to a separate pool of ocr_workers processes
+    (default: default_ocr_workers()), so slow OCR never holds up the text PDFs; with no OCR
+    workers they are reported as errors. The OS is asked to read the next prefetch files
+    after the running pairs' into memory, so reading them overlaps with parsing (0 turns it off).
+    """
+    counts = {'pairs': len(pairs), 'match': 0, 'mismatch': 0, 'error': 0, 'ocr': 0}
+    samples = {}  # stage -> wall ms per pair, while profiling
+    writer = None
+    if fmt == 'csv':
+        writer = csv.DictWriter(output, fieldnames=CSV_FIELDS + (['profile'] if profiler.enabled else []))
+        writer.writeheader()
+    if ocr_workers is None:
+        ocr_workers = default_ocr_workers()
+    from concurrent.futures import ProcessPoolExecutor
+    ocr_pool = ProcessPoolExecutor(max_workers=ocr_workers, initializer=configure_logging) if ocr_workers else None
+    # Workers start pairs in order, so the files after those of the running pairs are read next
+    files = [path for pair in pairs for path in pair]
+    running = 2 * (workers or os.cpu_count() or 1)
+    prefetched = min(len(files), running)
+    finished = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=configure_logging) as pool:
+            pending = {pool.submit(compare_pair, so, po, cache_path, cache_size) for so, po in pairs}
+            while pending:
+                ahead = min(len(files), running + 2 * finished + prefetch)
+                if prefetch and ahead > prefetched:
+                    pdf_io.prefetch(files[prefetched:ahead])
+                    prefetched = ahead
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished += 1
+                    result = future.result()
+                    if result.get('scanned') and ocr_pool is not None:
+                        counts['ocr'] += 1
+                        pending.add(ocr_pool.submit(compare_pair, result['so'], result['po'],
+                                                    cache_path, cache_size, True))
+                        continue
+                    _emit_result(result, counts, samples, output, writer, lines)
+    finally:
+        if ocr_pool is not None:
+            ocr_pool.shutdown(cancel_futures=True)
+    if samples:
+        print("Stage wall time per pair:\n" + format_histograms(samples), file=sys.stderr)
+    return counts
+
+def _emit_result(result: dict, counts: dict, samples: dict, output, writer, lines):
+    """Count one finished run_batch result and write it out"""
+    if result['error']:
+        counts['error'] += 1
+    elif result['match']:
+        counts['match'] += 1
+    else:
+        counts['mismatch'] += 1
+    profile = result.get('profile')
+    if profile:
+        for name, row in profile.items():
+            samples.setdefault(name, []).append(row['wall_ms'])
+    if writer:
+        row = {
+            'so': result['so'], 'po': result['po'], 'match': result['match'],
+            'issue_count': len(result['issues']), 'issues': '; '.join(result['issues']),
+            'error': result['error'] or '',
+        }
+        if profiler.enabled:
+            row['profile'] = json.dumps(profile or {})
+        writer.writerow(row)
+    else:
+        output.write(json.dumps(result) + '\n')
+    if lines is not None:
+        lines.write(result)
@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+"""
+Tkinter GUI for the Document Matcher
+Run: python document_matcher.py (with no arguments)
+"""
+
+import sqlite3
+import tkinter as tk
+from tkinter import filedialog, messagebox, scrolledtext, Frame, Label, ttk
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import List
+
+from matcher_core import (DocumentMatcher, PDFCache, Status, compare_parsed, configure_logging, format_profile,
+                          gui_log, load_document, merge_profiles, profiled_call, profiler)
+
+class DocumentMatcherGUI:
+    """GUI for Document Matcher"""
+
+    # How often the Tk loop checks on background loads and comparisons
+    POLL_MS = 50
+    # Quiet time after the last <Configure> before columns are re-laid out
+    RESIZE_DEBOUNCE_MS = 120
+    STATUS_COLORS = {Status.GREEN: '#90EE90', Status.YELLOW: '#FFFF99', Status.RED: '#FF7F7F'}
+    
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Document Matcher - SO vs PO Comparison")
+        self.root.geometry("1000x700")
+        self.root.configure(bg='white')
+        
+        # A cache that can't be opened (e.g. read-only folder) just means every load parses
+        try:
+            self.cache = PDFCache.shared()
+        except sqlite3.Error:
+            self.cache = None
+        self.matcher = DocumentMatcher(cache=self.cache)
+        # Loads and comparisons run in a background process pool (started on first use) so the
+        # window stays responsive; finished work is picked up by polling from the Tk loop
+        self.pool = None
+        # Comparisons all go to one worker of their own, so the matcher it keeps (see compare_parsed)
+        # always holds the previous comparison and a re-compare only rescores what changed
+        self.compare_pool = None
+        self._jobs = {}  # 'so' / 'po' / 'compare' -> (future, path)
+        self._compare_requested = False
+        self._polling = False
+        self._profiles = {}  # 'so' / 'po' / 'compare' -> worker stage report, while profiling
+        
+        # Title
+        title = tk.Label(root, text="Sales Order & Purchase Order Matcher", 
+                        font=("Arial", 14, "bold"), bg='white')
+        title.pack(pady=10)
+        
+        # SO Frame
+        so_frame = tk.LabelFrame(root, text="SALES ORDER (SO)", 
+                                font=("Arial", 11, "bold"), bg='white', padx=10, pady=10)
+        so_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        self.so_label = tk.Label(so_frame, text="No file selected", fg="gray")
+        self.so_label.pack(side=tk.LEFT)
+        
+        so_btn = tk.Button(so_frame, text="SELECT SO PDF", 
+                          command=self.select_so, bg='lightblue', padx=20)
+        so_btn.pack(side=tk.RIGHT)
+        
+        # PO Frame
+        po_frame = tk.LabelFrame(root, text="PURCHASE ORDER (PO)", 
+                                font=("Arial", 11, "bold"), bg='white', padx=10, pady=10)
+        po_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        self.po_label = tk.Label(po_frame, text="No file selected", fg="gray")
+        self.po_label.pack(side=tk.LEFT)
+        
+        po_btn = tk.Button(po_frame, text="SELECT PO PDF", 
+                          command=self.select_po, bg='lightgreen', padx=20)
+        po_btn.pack(side=tk.RIGHT)
+        
+        # --- Scrollable main content ---
+        # Use grid layout so scrollbars span the full window edges
+        content_container = tk.Frame(root, bg='white')
+        content_container.pack(fill=tk.BOTH, expand=True)
+        # Configure grid weights so content expands
+        content_container.grid_rowconfigure(0, weight=1)
+        content_container.grid_columnconfigure(0, weight=1)
+        self.content_canvas = tk.Canvas(content_container, bg='white', highlightthickness=0)
+        self.content_scrollbar = tk.Scrollbar(content_container, orient="vertical", command=self.content_canvas.yview)
+        self.content_hscrollbar = tk.Scrollbar(content_container, orient="horizontal", command=self.content_canvas.xview)
+        self.content_canvas.configure(yscrollcommand=self.content_scrollbar.set, xscrollcommand=self.content_hscrollbar.set)
+        # Grid layout: canvas (0,0), vscroll (0,1), hscroll (1,0), corner (1,1)
+        self.content_canvas.grid(row=0, column=0, sticky="nsew")
+        self.content_scrollbar.grid(row=0, column=1, sticky="ns")
+        self.content_hscrollbar.grid(row=1, column=0, sticky="ew")
+        # Corner widget to fill gap between scrollbars
+        corner = tk.Frame(content_container, bg='white', width=20, height=20)
+        corner.grid(row=1, column=1)
+        self.content_frame = tk.Frame(self.content_canvas, bg='white')
+        self.content_frame.bind(
+            "<Configure>", lambda e: self.content_canvas.configure(scrollregion=self.content_canvas.bbox("all")))
+        self.content_canvas.create_window((0, 0), window=self.content_frame, anchor="nw")
+        # Enable mouse wheel scrolling globally so it works anywhere in the window
+        self.root.bind_all("<MouseWheel>", self._on_mousewheel)
+        # Hold Shift to scroll horizontally (Windows)
+        self.root.bind_all("<Shift-MouseWheel>", self._on_shift_mousewheel)
+        # Window resizes are debounced: column widths are recomputed once the size settles
+        self._resize_job = None
+        self.root.bind("<Configure>", self._on_resize)
+        # Summary Grid
+        summary_label = tk.Label(self.content_frame, text="Field Match Summary:", font=("Arial", 10, "bold"), bg='white')
+        summary_label.pack(anchor=tk.W, padx=10, pady=(10, 0))
+        self.summary_frame = Frame(self.content_frame, bg='white')
+        self.summary_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        # Address fields to show
+        self.summary_fields = [
+            ('name', 'Name'),
+            ('address', 'Address'),
+            ('city', 'City'),
+            ('state', 'State'),
+            ('zip_code', 'Zip'),
+        ]
+        self.summary_labels = {}
+        for idx, (key, label) in enumerate(self.summary_fields):
+            lbl = Label(self.summary_frame, text=label, width=12, relief='groove', bg='lightgray', font=("Arial", 10, "bold"))
+            lbl.grid(row=0, column=idx, padx=2, pady=2)
+            val = Label(self.summary_frame, text="", width=20, relief='ridge', bg='white', font=("Arial", 10))
+            val.grid(row=1, column=idx, padx=2, pady=2)
+            self.summary_labels[key] = val
+
+        # Line Item Grid
+        lineitem_label = tk.Label(self.content_frame, text="Line Item Comparison:", font=("Arial", 10, "bold"), bg='white')
+        lineitem_label.pack(anchor=tk.W, padx=10, pady=(0, 0))
+        self.lineitem_frame = Frame(self.content_frame, bg='white')
+        self.lineitem_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        # A Treeview draws only the rows in view, so a long PO costs no widgets per cell;
+        # each row is colored by its worst field status
+        self.lineitem_columns = [
+            ('so_sku', 'SO SKU', 120),
+            ('po_sku', 'PO SKU', 120),
+            ('so_desc', 'SO Desc', 300),
+            ('po_desc', 'PO Desc', 300),
+            ('so_qty', 'SO Qty', 60),
+            ('po_qty', 'PO Qty', 60),
+            ('differs', 'Differs', 130),
+        ]
+        self.lineitem_tree = ttk.Treeview(self.lineitem_frame, columns=[c[0] for c in self.lineitem_columns],
+                                          show='headings', height=12)
+        for key, heading, width in self.lineitem_columns:
+            self.lineitem_tree.heading(key, text=heading, anchor='w')
+            self.lineitem_tree.column(key, width=width, minwidth=40, stretch=key in ('so_desc', 'po_desc'))
+        for status, color in self.STATUS_COLORS.items():
+            self.lineitem_tree.tag_configure(status.label, background=color)
+        # Tk 8.6.9 style maps hide tag backgrounds; drop the default (non-selected) background entry
+        style = ttk.Style(root)
+        style.map('Treeview', background=[m for m in style.map('Treeview', query_opt='background')
+                                          if m[:2] != ('!disabled', '!selected')])
+        lineitem_scroll = tk.Scrollbar(self.lineitem_frame, orient=tk.VERTICAL, command=self.lineitem_tree.yview)
+        self.lineitem_tree.configure(yscrollcommand=lineitem_scroll.set)
+        self.lineitem_tree.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        lineitem_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # Results
+        results_label = tk.Label(self.content_frame, text="Comparison Results:", 
+            font=("Arial", 10, "bold"), bg='white')
+        results_label.pack(anchor=tk.W, padx=10, pady=(0, 0))
+        # Container with both vertical and horizontal scrollbars
+        results_container = tk.Frame(self.content_frame, bg='white')
+        results_container.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        v_scroll = tk.Scrollbar(results_container, orient=tk.VERTICAL)
+        h_scroll = tk.Scrollbar(results_container, orient=tk.HORIZONTAL)
+        self.results_text = tk.Text(results_container, height=20, width=120,
+                        font=("Courier", 9), wrap=tk.NONE,
+                        yscrollcommand=v_scroll.set,
+                        xscrollcommand=h_scroll.set)
+        v_scroll.config(command=self.results_text.yview)
+        h_scroll.config(command=self.results_text.xview)
+        # Grid layout to keep scrollbars fixed to edges
+        results_container.grid_rowconfigure(0, weight=1)
+        results_container.grid_columnconfigure(0, weight=1)
+        self.results_text.grid(row=0, column=0, sticky="nsew")
+        v_scroll.grid(row=0, column=1, sticky="ns")
+        h_scroll.grid(row=1, column=0, sticky="ew")
+        
+        # Buttons (move to top, just below title)
+        button_frame = tk.Frame(root, bg='white')
+        button_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+
+        self.compare_btn = tk.Button(button_frame, text="COMPARE", 
+                        command=self.compare, bg='#90EE90', 
+                        font=("Arial", 10, "bold"), padx=20, pady=10)
+        self.compare_btn.pack(side=tk.LEFT, padx=5)
+
+        self.cancel_btn = tk.Button(button_frame, text="CANCEL", 
+                    command=self.cancel, font=("Arial", 10, "bold"), 
+                    padx=20, pady=10, state=tk.DISABLED)
+        self.cancel_btn.pack(side=tk.LEFT, padx=5)
+
+        copy_btn = tk.Button(button_frame, text="COPY TO CLIPBOARD", 
+                    command=self.copy_to_clipboard, bg='#87CEEB', 
+                    font=("Arial", 10, "bold"), padx=20, pady=10)
+        copy_btn.pack(side=tk.LEFT, padx=5)
+
+        clear_btn = tk.Button(button_frame, text="CLEAR", 
+                     command=self.clear, font=("Arial", 10, "bold"), 
+                     padx=20, pady=10)
+        clear_btn.pack(side=tk.LEFT, padx=5)
+
+        clearall_btn = tk.Button(button_frame, text="CLEAR ALL", 
+                    command=self.clear_all, font=("Arial", 10, "bold"), 
+                    padx=20, pady=10, bg='#FFD700')
+        clearall_btn.pack(side=tk.LEFT, padx=5)
+
+        exit_btn = tk.Button(button_frame, text="EXIT", 
+                    command=self.exit, font=("Arial", 10, "bold"), 
+                    padx=20, pady=10)
+        exit_btn.pack(side=tk.RIGHT, padx=5)
+        self.root.protocol("WM_DELETE_WINDOW", self.exit)
+
+        # Progress while files parse or a comparison runs
+        progress_frame = tk.Frame(root, bg='white')
+        progress_frame.pack(fill=tk.X, padx=10, pady=(5, 0))
+        self.progress = ttk.Progressbar(progress_frame, mode='indeterminate', length=200)
+        self.progress.pack(side=tk.LEFT, padx=5)
+        self.status_label = tk.Label(progress_frame, text="", fg="gray", bg='white')
+        self.status_label.pack(side=tk.LEFT, padx=5)
+    def _bind_mousewheel(self):
+        # Bind mouse wheel to the content canvas only (Windows)
+        try:
+            self.content_canvas.bind("<MouseWheel>", self._on_mousewheel)
+        except Exception:
+            pass
+    def _unbind_mousewheel(self):
+        try:
+            self.content_canvas.unbind("<MouseWheel>")
+        except Exception:
+            pass
+    def _on_mousewheel(self, event):
+        # Normalize delta: typically +/-120 per notch on Windows
+        try:
+            delta = int(event.delta)
+        except Exception:
+            delta = 0
+        if delta == 0:
+            return
+        steps = -int(delta / 120)  # negative for upward scroll
+        try:
+            # If user is over the results text, scroll that; otherwise scroll the main content
+            if getattr(event, 'widget', None) is self.results_text:
+                self.results_text.yview_scroll(steps, "units")
+            elif getattr(event, 'widget', None) is self.lineitem_tree:
+                self.lineitem_tree.yview_scroll(steps, "units")
+            else:
+                self.content_canvas.yview_scroll(steps, "units")
+        except Exception:
+            pass
+
+    def _on_shift_mousewheel(self, event):
+        # Horizontal scroll when holding Shift
+        try:
+            delta = int(event.delta)
+        except Exception:
+            delta = 0
+        if delta == 0:
+            return
+        steps = -int(delta / 120)
+        try:
+            if getattr(event, 'widget', None) is self.results_text:
+                self.results_text.xview_scroll(steps, "units")
+            else:
+                self.content_canvas.xview_scroll(steps, "units")
+        except Exception:
+            pass
+
+    def _on_resize(self, event=None):
+        """Schedule a column re-layout once resizing pauses (every child widget fires <Configure> too)"""
+        if event is not None and event.widget is not self.root:
+            return
+        if self._resize_job is not None:
+            self.root.after_cancel(self._resize_job)
+        self._resize_job = self.root.after(self.RESIZE_DEBOUNCE_MS, self._layout_columns)
+
+    def _layout_columns(self):
+        """Share the available width between the two description columns"""
+        self._resize_job = None
+        try:
+            current_width = self.content_frame.winfo_width()
+        except Exception:
+            current_width = 800
+        fixed = sum(width for key, _, width in self.lineitem_columns if key not in ('so_desc', 'po_desc'))
+        desc_width = max(200, (current_width - fixed - 40) // 2)
+        for key in ('so_desc', 'po_desc'):
+            self.lineitem_tree.column(key, width=desc_width)
+    
+    def select_so(self):
+        """Select SO PDF file"""
+        path = filedialog.askopenfilename(
+            title="Select Sales Order PDF",
+            filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")],
+            initialdir=str(Path(__file__).parent / "Example_Pairs")
+        )
+        
+        if path:
+            self._start_load('so', path)
+    
+    def select_po(self):
+        """Select PO PDF file"""
+        path = filedialog.askopenfilename(
+            title="Select Purchase Order PDF",
+            filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")],
+            initialdir=str(Path(__file__).parent / "Example_Pairs")
+        )
+        
+        if path:
+            self._start_load('po', path)
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=2, initializer=configure_logging)
+        return self.pool
+
+    def _ensure_compare_pool(self) -> ProcessPoolExecutor:
+        if self.compare_pool is None:
+            self.compare_pool = ProcessPoolExecutor(max_workers=1, initializer=configure_logging)
+        return self.compare_pool
+
+    def _submit(self, pool: ProcessPoolExecutor, fn, *args):
+        # While profiling, workers send their stage timings back with the result
+        if profiler.enabled:
+            return pool.submit(profiled_call, fn, *args)
+        return pool.submit(fn, *args)
+
+    def _result(self, kind: str, future):
+        result = future.result()
+        if profiler.enabled:
+            result, self._profiles[kind] = result
+        return result
+
+    def _start_load(self, kind: str, path: str):
+        """Start parsing a just-selected file in the background, replacing any earlier load of that kind"""
+        self._drop_job(kind)
+        self._drop_job('compare')
+        if kind == 'so':
+            self.matcher.so_path = self.matcher.so_address = None
+            self.matcher.so_items = []
+            label = self.so_label
+        else:
+            self.matcher.po_path = self.matcher.po_address = None
+            self.matcher.po_items = []
+            label = self.po_label
+        label.config(text=f"… {Path(path).name} (parsing)", fg="gray")
+        cache_path = self.cache.path if self.cache is not None else None
+        try:
+            # One file at a time, so a scan is simply OCR'd in the load worker
+            future = self._submit(self._ensure_pool(), load_document, path, kind == 'so', cache_path,
+                                  PDFCache.DEFAULT_MAX_BYTES, True)
+        except Exception as e:
+            self.pool = None
+            messagebox.showerror("Error", f"Failed to load {kind.upper()}: {e}")
+            label.config(text="Error loading file", fg="red")
+            return
+        self._jobs[kind] = (future, path)
+        self._busy()
+
+    def _drop_job(self, kind: str):
+        """Forget a job; it is cancelled if it has not started, otherwise its result is ignored"""
+        job = self._jobs.pop(kind, None)
+        if job is not None:
+            job[0].cancel()
+
+    def _show_status(self):
+        names = {'so': 'SO', 'po': 'PO', 'compare': 'comparison'}
+        self.status_label.config(text="Working: " + ", ".join(names[k] for k in self._jobs))
+
+    def _busy(self):
+        """Show progress for the running jobs and make sure the poll loop is running"""
+        self._show_status()
+        self.cancel_btn.config(state=tk.NORMAL)
+        self.progress.start(10)
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_MS, self._poll)
+
+    def _idle(self):
+        self.progress.stop()
+        self.status_label.config(text="")
+        self.cancel_btn.config(state=tk.DISABLED)
+
+    def _poll(self):
+        """Collect finished background work on the Tk thread"""
+        for kind in ('so', 'po'):
+            job = self._jobs.get(kind)
+            if job is None or not job[0].done():
+                continue
+            del self._jobs[kind]
+            future, path = job
+            label = self.so_label if kind == 'so' else self.po_label
+            try:
+                address, items = self._result(kind, future)
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    self.pool = None
+                messagebox.showerror("Error", f"Failed to load {kind.upper()}: {e}")
+                label.config(text="Error loading file", fg="red")
+                self._compare_requested = False
+                continue
+            if kind == 'so':
+                self.matcher.so_address, self.matcher.so_items, self.matcher.so_path = address, items, path
+            else:
+                self.matcher.po_address, self.matcher.po_items, self.matcher.po_path = address, items, path
+            gui_log.debug("%s items loaded: %d %s", kind.upper(), len(items), items)
+            label.config(text=f"✓ {Path(path).name}", fg="green")
+
+        # COMPARE pressed while files were still parsing runs as soon as both are ready
+        if self._compare_requested and 'so' not in self._jobs and 'po' not in self._jobs:
+            self._compare_requested = False
+            if self.matcher.so_path and self.matcher.po_path:
+                self._start_compare()
+
+        job = self._jobs.get('compare')
+        if job is not None and job[0].done():
+            del self._jobs['compare']
+            try:
+                result = self._result('compare', job[0])
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    self.compare_pool = None
+                messagebox.showerror("Error", f"Comparison failed: {e}")
+            else:
+                profiler.reset()
+                with profiler.stage('render') as stage:
+                    stage.count(items=len(result[3]))
+                    self._show_results(*result)
+                if profiler.enabled:
+                    self._show_profile()
+
+        if self._jobs:
+            self._show_status()
+            self.root.after(self.POLL_MS, self._poll)
+        else:
+            self._polling = False
+            self._idle()
+
+    def _start_compare(self):
+        so = (self.matcher.so_address, self.matcher.so_items)
+        po = (self.matcher.po_address, self.matcher.po_items)
+        try:
+            future = self._submit(self._ensure_compare_pool(), compare_parsed, so, po, self.matcher.thresholds)
+        except Exception as e:
+            self.compare_pool = None
+            messagebox.showerror("Error", f"Comparison failed: {e}")
+            return
+        self._jobs['compare'] = (future, None)
+        self._busy()
+
+    def cancel(self):
+        """Stop waiting for background loads and comparisons"""
+        for kind in list(self._jobs):
+            self._drop_job(kind)
+            if kind in ('so', 'po'):
+                label = self.so_label if kind == 'so' else self.po_label
+                label.config(text="Cancelled - select the file again", fg="gray")
+        self._compare_requested = False
+        self._idle()
+
+    def exit(self):
+        self.cancel()
+        for pool in (self.pool, self.compare_pool):
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        self.root.quit()
+    
+    def compare(self):
+        """Run comparison (in the background; waits for files that are still parsing)"""
+        so_ready = self.matcher.so_path or 'so' in self._jobs
+        po_ready = self.matcher.po_path or 'po' in self._jobs
+        if not so_ready or not po_ready:
+            messagebox.showwarning("Missing Files", "Please select both SO and PO files")
+            return
+        if 'so' in self._jobs or 'po' in self._jobs:
+            self._compare_requested = True
+            return
+        self._drop_job('compare')
+        self._start_compare()
+
+    def _show_results(self, match: bool, issues: List[str], field_status: dict, lineitem_status: list):
+        """Fill the summary, line item grid and results text from a comparison"""
+        try:
+            gui_log.debug("lineitem_status: %d %s", len(lineitem_status), lineitem_status)
+            # Update line item grid
+            self.lineitem_tree.delete(*self.lineitem_tree.get_children())
+            for item in lineitem_status:
+                so = item.so
+                po = item.po
+                statuses = {'SKU': item.sku_status, 'Desc': item.desc_status, 'Qty': item.qty_status}
+                differs = ", ".join(name if status == Status.RED else f"{name} (close)"
+                                    for name, status in statuses.items() if status != Status.GREEN)
+                self.lineitem_tree.insert('', tk.END, tags=(item.worst.label,), values=(
+                    so.sku, po.sku, so.description, po.description, so.qty, po.qty, differs))
+            # Update summary grid
+            so_addr = self.matcher.so_address
+            po_addr = self.matcher.po_address
+            for key, label in self.summary_fields:
+                so_val = getattr(so_addr, key, "")
+                po_val = getattr(po_addr, key, "")
+                display = f"SO: {so_val}\nPO: {po_val}"
+                color = self.STATUS_COLORS.get(field_status.get(key), 'white')
+                self.summary_labels[key].config(text=display, bg=color)
+            self.results_text.config(state=tk.NORMAL)
+            self.results_text.delete(1.0, tk.END)
+            so_file = Path(self.matcher.so_path).name
+            po_file = Path(self.matcher.po_path).name
+            self.results_text.insert(tk.END, f"SO: {so_file}\n")
+            self.results_text.insert(tk.END, f"PO: {po_file}\n")
+            self.results_text.insert(tk.END, "\n" + "="*100 + "\n\n")
+            # --- Custom summary answers ---
+            # 1. Ship address match
+            addr_match = field_status.get('address', Status.RED) == Status.GREEN and \
+                         field_status.get('city', Status.RED) == Status.GREEN and \
+                         field_status.get('state', Status.RED) == Status.GREEN and \
+                         field_status.get('zip_code', Status.RED) == Status.GREEN
+            self.results_text.insert(tk.END, f"\nQ1: Does the ship address on the PO match the SO?\nA: {'YES' if addr_match else 'NO'}\n")
+            # 2. SKU number match
+            sku_all_match = all(item.sku_status == Status.GREEN for item in lineitem_status)
+            self.results_text.insert(tk.END, f"\nQ2: Is the correct SKU number listed for each item when compared to the SO?\nA: {'YES' if sku_all_match else 'NO'}\n")
+            # 3. SKU Description match
+            desc_all_match = all(item.desc_status == Status.GREEN for item in lineitem_status)
+            self.results_text.insert(tk.END, f"\nQ3: Does the SKU Description of each line item match the description of the line items in the SO approved by the customer?\nA: {'YES' if desc_all_match else 'NO'}\n")
+            # 4. Order quantity match
+            qty_all_match = all(item.qty_status == Status.GREEN for item in lineitem_status)
+            self.results_text.insert(tk.END, f"\nQ4: Does the order quantity of each line item match the order quantity of SO?\nA: {'YES' if qty_all_match else 'NO'}\n\n")
+            # --- End custom summary ---
+            if match:
+                self.results_text.insert(tk.END, "STATUS: COMPLETE MATCH\n\n", "success")
+            else:
+                self.results_text.insert(tk.END, "STATUS: MISMATCH - MANUAL REVIEW REQUIRED\n\n", "error")
+                self.results_text.insert(tk.END, "Issues Found:\n" + "-"*100 + "\n")
+                for issue in issues:
+                    self.results_text.insert(tk.END, f"  - {issue}\n")
+            self.results_text.config(state=tk.DISABLED)
+            # Configure tags for colors
+            self.results_text.tag_config("success", foreground="green")
+            self.results_text.tag_config("error", foreground="red")
+        except Exception as e:
+            messagebox.showerror("Error", f"Comparison failed: {e}")
+    
+    def _show_profile(self):
+        """Append where the time went (parse of each file, comparison, rendering) to the results"""
+        report = merge_profiles([self._profiles.get('so', {}), self._profiles.get('po', {}),
+                                 self._profiles.get('compare', {}), profiler.report()])
+        text = format_profile(report)
+        gui_log.info("Stage timings:\n%s", text)
+        self.results_text.config(state=tk.NORMAL)
+        self.results_text.insert(tk.END, "\nTiming:\n" + "-"*100 + "\n" + text + "\n")
+        self.results_text.config(state=tk.DISABLED)
+
+    def copy_to_clipboard(self):
+        """Copy results to clipboard"""
+        text = self.results_text.get(1.0, tk.END)
+        if text.strip():
+            self.root.clipboard_clear()
+            self.root.clipboard_append(text)
+            messagebox.showinfo("Success", "Results copied to clipboard!")
+        else:
+            messagebox.showwarning("No Results", "Run a comparison first")
+    
+    def clear(self):
+        """Clear results and selections, but keep loaded files"""
+        self.results_text.config(state=tk.NORMAL)
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.config(state=tk.DISABLED)
+        # Clear line item grid
+        self.lineitem_tree.delete(*self.lineitem_tree.get_children())
+        # Optionally clear summary fields
+        for key, label in self.summary_fields:
+            self.summary_labels[key].config(text="", bg="white")
+
+    def clear_all(self):
+        """Fully reset the interface for new files"""
+        self.cancel()
+        self.matcher = DocumentMatcher(cache=self.cache)
+        self.so_label.config(text="No file selected", fg="gray")
+        self.po_label.config(text="No file selected", fg="gray")
+        self.results_text.config(state=tk.NORMAL)
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.config(state=tk.DISABLED)
+        # Clear line item grid
+        self.lineitem_tree.delete(*self.lineitem_tree.get_children())
+        # Clear summary fields
+        for key, label in self.summary_fields:
+            self.summary_labels[key].config(text="", bg="white")
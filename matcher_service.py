@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Local HTTP/JSON service for the Document Matcher
+Keeps a warm process pool so ERP integrations pay the import and startup cost once
+Run: python document_matcher.py serve --port 8765
+"""
+
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+import alignment
+import matcher_core as dm
+import similarity
+
+service_log = logging.getLogger("document_matcher.service")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Comparisons allowed to wait per worker before new requests are turned away with 503
+DEFAULT_QUEUE_PER_WORKER = 4
+MAX_BODY_BYTES = 64 * 1024 * 1024
+MAX_HEADER_LINES = 100
+# Keep-alive connections idle longer than this are closed
+IDLE_TIMEOUT = 30.0
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               408: 'Request Timeout', 413: 'Payload Too Large', 503: 'Service Unavailable'}
+
+class HTTPError(Exception):
+    """Request problem answered with an HTTP status and a JSON error body"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def _warm_worker(cache_path: Optional[str] = None, cache_size: int = dm.PDFCache.DEFAULT_MAX_BYTES):
+    """Pool initializer: logging as configured in the parent, then everything a comparison loads on
+    first use (PDF engine, NumPy/SciPy, rapidfuzz, layouts, master data, catalog, cache) up front"""
+    dm.configure_logging()
+    engine = dm.backend_chain()[0]
+    try:
+        engine.import_engine()
+    except ImportError as e:
+        # Only warm-up time is lost: the first comparison imports it (or falls back down the chain)
+        service_log.warning("Could not preload the %s engine: %s", engine.name, e)
+    alignment.preload()
+    similarity.indel()
+    try:
+        registry = dm.LayoutRegistry.shared()
+        master = dm.MasterData.shared()
+        for layout in registry.layouts + list(registry.generic.values()):
+            master.vendor_index(layout.vendor_keywords)
+        dm.SkuCatalog.shared()
+        if cache_path:
+            dm.PDFCache.shared(cache_path, cache_size)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        # Left unloaded, so each comparison reports the problem as its error
+        service_log.warning("Could not preload configuration: %s", e)
+
+def _ping() -> int:
+    return os.getpid()
+
+class MatcherService:
+    """asyncio HTTP server that runs compare_pair on a warm process pool
+
+    POST /compare  {"so": path, "po": path} or {"so_pdf": base64, "po_pdf": base64}
+    GET  /health   liveness and current load
+    GET  /metrics  request counts and comparison latency
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: Optional[int] = None,
+                 queue_size: Optional[int] = None, cache_path: Optional[str] = None,
+                 cache_size: int = dm.PDFCache.DEFAULT_MAX_BYTES, ocr_workers: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size if queue_size is not None else self.workers * DEFAULT_QUEUE_PER_WORKER
+        self.cache_path = cache_path
+        self.cache_size = cache_size
+        self.pool = None
+        # Scanned documents are OCR'd on their own pool so they can't tie up the warm text workers
+        self.ocr_workers = dm.default_ocr_workers() if ocr_workers is None else ocr_workers
+        self.ocr_pool = None
+        self.server = None
+        self.in_flight = 0
+        self.started = time.time()
+        self.counts = {'requests': 0, 'compared': 0, 'match': 0, 'mismatch': 0, 'error': 0, 'rejected': 0, 'ocr': 0}
+        self.latencies = deque(maxlen=1000)
+
+    async def start(self):
+        """Start the pool, wait until every worker is up, then start listening"""
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker,
+                                        initargs=(self.cache_path, self.cache_size))
+        if self.ocr_workers:
+            self.ocr_pool = ProcessPoolExecutor(max_workers=self.ocr_workers, initializer=dm.configure_logging)
+        loop = asyncio.get_running_loop()
+        # Workers are spawned lazily; one task each forces the imports to happen now
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _ping) for _ in range(self.workers)))
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        service_log.info("Listening on http://%s:%d with %d workers", self.host, self.port, self.workers)
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+        if self.ocr_pool is not None:
+            self.ocr_pool.shutdown(cancel_futures=True)
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Document Matcher service on http://{self.host}:{self.port} "
+              f"({self.workers} workers, up to {self.queue_size} comparisons queued)", file=sys.stderr)
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """One connection: requests are answered in order until the client closes or asks to"""
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                except HTTPError as e:
+                    await self._respond(writer, e.status, {'error': str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self.counts['requests'] += 1
+                try:
+                    status, payload = await self._dispatch(method, path, body)
+                except HTTPError as e:
+                    status, payload = e.status, {'error': str(e)}
+                extra = {'Retry-After': '1'} if status == 503 else None
+                await self._respond(writer, status, payload, keep_alive, extra)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """Parse a request line, headers and Content-Length body; None on a clean close"""
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise HTTPError(400, "Too many headers")
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"Body larger than {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target.split('?', 1)[0], headers, body
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: dict,
+                       keep_alive: bool = True, extra_headers: Optional[dict] = None):
+        data = json.dumps(payload).encode('utf-8')
+        head = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+                "Content-Type: application/json",
+                f"Content-Length: {len(data)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        for name, value in (extra_headers or {}).items():
+            head.append(f"{name}: {value}")
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + data)
+        await writer.drain()
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, dict]:
+        routes = {'/compare': ('POST', self._compare), '/health': ('GET', self._health),
+                  '/metrics': ('GET', self._metrics)}
+        if path not in routes:
+            raise HTTPError(404, f"No such endpoint: {path}")
+        allowed, handler = routes[path]
+        if method != allowed:
+            raise HTTPError(405, f"{path} only accepts {allowed}")
+        return await handler(body)
+
+    async def _health(self, body: bytes) -> Tuple[int, dict]:
+        return 200, {'status': 'ok', 'workers': self.workers, 'in_flight': self.in_flight,
+                     'queue_size': self.queue_size}
+
+    async def _metrics(self, body: bytes) -> Tuple[int, dict]:
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1) if latencies else None
+
+        return 200, dict(self.counts, in_flight=self.in_flight, uptime_s=round(time.time() - self.started, 1),
+                         latency_ms={'p50': percentile(0.5), 'p95': percentile(0.95), 'p99': percentile(0.99)})
+
+    async def _compare(self, body: bytes) -> Tuple[int, dict]:
+        try:
+            request = json.loads(body or b'{}')
+        except (ValueError, UnicodeDecodeError):
+            raise HTTPError(400, "Body must be JSON")
+        if not isinstance(request, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        # Backpressure: refuse rather than queue without bound
+        if self.in_flight >= self.queue_size:
+            self.counts['rejected'] += 1
+            return 503, {'error': 'Busy, retry shortly'}
+        self.in_flight += 1
+        upload_dir = None
+        try:
+            paths = {}
+            for side in ('so', 'po'):
+                if request.get(f'{side}_pdf'):
+                    if upload_dir is None:
+                        upload_dir = tempfile.mkdtemp(prefix='matcher-')
+                    try:
+                        data = base64.b64decode(request[f'{side}_pdf'], validate=True)
+                    except (binascii.Error, TypeError):
+                        raise HTTPError(400, f"{side}_pdf is not valid base64")
+                    paths[side] = os.path.join(upload_dir, f"{side}.pdf")
+                    with open(paths[side], 'wb') as f:
+                        f.write(data)
+                elif isinstance(request.get(side), str):
+                    paths[side] = request[side]
+                else:
+                    raise HTTPError(400, f"Provide '{side}' (a path) or '{side}_pdf' (base64 PDF)")
+            start = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self.pool, dm.compare_pair, paths['so'], paths['po'], self.cache_path, self.cache_size)
+            if result.get('scanned') and self.ocr_pool is not None:
+                self.counts['ocr'] += 1
+                result = await loop.run_in_executor(
+                    self.ocr_pool, dm.compare_pair, paths['so'], paths['po'], self.cache_path, self.cache_size, True)
+            self.latencies.append(time.perf_counter() - start)
+        finally:
+            self.in_flight -= 1
+            if upload_dir is not None:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+        self.counts['compared'] += 1
+        if result['error']:
+            self.counts['error'] += 1
+        elif result['match']:
+            self.counts['match'] += 1
+        else:
+            self.counts['mismatch'] += 1
+        # Uploads are reported under the names the client gave them, not the temp files
+        for side in ('so', 'po'):
+            if request.get(f'{side}_pdf'):
+                result[side] = request.get(f'{side}_name') or request.get(side) or f"{side}.pdf"
+        return 200, result
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: Optional[int] = None,
+          queue_size: Optional[int] = None, cache_path: Optional[str] = None,
+          cache_size: int = dm.PDFCache.DEFAULT_MAX_BYTES, ocr_workers: Optional[int] = None):
+    """Run the service until interrupted"""
+    service = MatcherService(host, port, workers, queue_size, cache_path, cache_size, ocr_workers)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
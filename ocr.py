@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+OCR fallback for scanned documents in the Document Matcher
+Pages without a text layer are rendered and read with Tesseract, and the text is cached by page image hash
+Needs pytesseract (and the Tesseract program) plus PyMuPDF or pypdfium2 to render pages
+"""
+
+import hashlib
+import importlib.util
+import logging
+import os
+from typing import Optional, Tuple
+
+try:
+    import pytesseract
+except ImportError:  # scanned documents are then reported instead of read
+    pytesseract = None
+
+ocr_log = logging.getLogger("document_matcher.ocr")
+
+OCR_LANG_ENV_VAR = "DOCUMENT_MATCHER_OCR_LANG"
+DEFAULT_LANG = "eng"
+# Render resolution; Tesseract is most accurate on text around 300 DPI
+OCR_DPI = 300
+# Treat each page as one block of text so table rows come out one per line, as text extraction gives them
+TESSERACT_CONFIG = "--psm 6"
+
+_available = None
+
+def renderer() -> Optional[str]:
+    """The installed page renderer ('pymupdf' or 'pdfium'), or None"""
+    if importlib.util.find_spec("pymupdf") or importlib.util.find_spec("fitz"):
+        return "pymupdf"
+    if importlib.util.find_spec("pypdfium2"):
+        return "pdfium"
+    return None
+
+def available() -> bool:
+    """Whether pages can be OCR'd here: pytesseract, the Tesseract program and a renderer (checked once)"""
+    global _available
+    if _available is None:
+        _available = False
+        if pytesseract is not None and renderer() is not None:
+            try:
+                pytesseract.get_tesseract_version()
+                _available = True
+            except Exception as e:
+                ocr_log.info("Tesseract not usable: %s", e)
+    return _available
+
+def missing() -> str:
+    """What to install to enable OCR, for error messages"""
+    needs = []
+    if pytesseract is None:
+        needs.append("pytesseract (pip install pytesseract)")
+    elif not available():
+        needs.append("the Tesseract program")
+    if renderer() is None:
+        needs.append("PyMuPDF or pypdfium2")
+    return " and ".join(needs)
+
+class PageOCR:
+    """Reads pages of one PDF with Tesseract; use as a context manager
+
+    The PDF is opened for rendering on the first page asked for. Text is cached by a hash
+    of the rendered page image (plus language and settings), so a page seen before, even in
+    another file, isn't read again. cache is anything with get_page(key) / put_page(key, text),
+    such as a PDFCache.
+    """
+
+    def __init__(self, pdf_path: str, cache=None, lang: Optional[str] = None):
+        if not available():
+            raise RuntimeError(f"OCR needs {missing()}")
+        self.pdf_path = pdf_path
+        self.cache = cache
+        self.lang = lang or os.environ.get(OCR_LANG_ENV_VAR) or DEFAULT_LANG
+        self.pages_read = 0       # pages sent to Tesseract (cache misses)
+        self._renderer = renderer()
+        self._doc = None
+        # Tesseract's own threads would let each OCR worker take every core; the pool size is the limit
+        os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+    def text(self, index: int) -> str:
+        """Text of the page at 0-based index"""
+        image, pixels = self._render(index)
+        digest = hashlib.sha256(pixels)
+        digest.update(f"{image.size}:{self.lang}:{OCR_DPI}:{TESSERACT_CONFIG}".encode())
+        key = digest.hexdigest()
+        if self.cache is not None:
+            text = self.cache.get_page(key)
+            if text is not None:
+                ocr_log.debug("Page %d of %s from the OCR cache", index + 1, self.pdf_path)
+                return text
+        text = pytesseract.image_to_string(image, lang=self.lang, config=TESSERACT_CONFIG)
+        self.pages_read += 1
+        ocr_log.info("OCR'd page %d of %s (%d characters)", index + 1, self.pdf_path, len(text))
+        if self.cache is not None:
+            self.cache.put_page(key, text)
+        return text
+
+    def _render(self, index: int) -> Tuple[object, bytes]:
+        """(greyscale PIL image, its raw pixel bytes) for a page"""
+        from PIL import Image
+        if self._renderer == "pymupdf":
+            try:
+                import pymupdf
+            except ImportError:
+                import fitz as pymupdf
+            if self._doc is None:
+                self._doc = pymupdf.open(self.pdf_path)
+            pix = self._doc[index].get_pixmap(dpi=OCR_DPI, colorspace=pymupdf.csGRAY)
+            pixels = pix.samples
+            return Image.frombytes("L", (pix.width, pix.height), pixels), pixels
+        import pypdfium2
+        if self._doc is None:
+            self._doc = pypdfium2.PdfDocument(self.pdf_path)
+        image = self._doc[index].render(scale=OCR_DPI / 72, grayscale=True).to_pil()
+        return image, image.tobytes()
+
+    def close(self):
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
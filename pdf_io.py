@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+PDF file access for the Document Matcher
+Files are memory-mapped and handed to the extraction engines as buffers, so a PDF is read from disk
+once for both its content hash and its text, and batch runs ask the OS to read upcoming files ahead
+"""
+
+import hashlib
+import io
+import logging
+import mmap
+import os
+from typing import Iterable, Optional
+
+io_log = logging.getLogger("document_matcher.io")
+
+# Files ahead of the ones being compared that a batch run asks the OS to start reading
+PREFETCH_FILES = 8
+
+class MappedPDF:
+    """The bytes of one PDF, mapped into memory; use as a context manager (or call open() and close())
+
+    The mapping is copy-on-write, so it is never copied (nothing writes to it) but can
+    still be wrapped as a writable buffer by engines such as PDFium that want one. Files
+    that can't be mapped (empty, or on a filesystem without mmap) are read into memory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.view = memoryview(b'')
+        self._map = None
+        self._data = b''
+        self._sha256 = None
+        self._open = False
+
+    def open(self) -> "MappedPDF":
+        with open(self.path, 'rb') as f:
+            # The mapping holds its own handle, so the file can be closed straight away
+            if os.fstat(f.fileno()).st_size:
+                try:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+                except (OSError, ValueError) as e:
+                    io_log.debug("Could not map %s, reading it instead: %s", self.path, e)
+            if self._map is None:
+                self._data = f.read()
+        self.view = memoryview(self._map if self._map is not None else self._data)
+        self._open = True
+        return self
+
+    def __len__(self) -> int:
+        return len(self.view)
+
+    def stream(self):
+        """A seekable binary file over the bytes, for engines that read from a file object"""
+        if self._map is not None:
+            self._map.seek(0)
+            return self._map
+        return io.BytesIO(self._data)
+
+    def sha256(self) -> str:
+        """SHA-256 hex digest of the file bytes, worked out once"""
+        if self._sha256 is None:
+            # Every page is about to be read; have the OS read ahead of the hash instead of page by page
+            advise(self._map, 'MADV_WILLNEED')
+            self._sha256 = hashlib.sha256(self.view).hexdigest()
+        return self._sha256
+
+    def close(self):
+        self.view.release()
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # An engine still holds a view of it; the mapping goes when that is collected
+                io_log.debug("%s is still in use, leaving it mapped", self.path)
+            self._map = None
+        self._data = b''
+        self._open = False
+
+    def __enter__(self):
+        return self if self._open else self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def advise(mapping: Optional[mmap.mmap], name: str):
+    """Pass a madvise() hint (e.g. 'MADV_WILLNEED') for a mapping, where the platform has it"""
+    flag = getattr(mmap, name, None)
+    if mapping is not None and flag is not None:
+        try:
+            mapping.madvise(flag)
+        except OSError:
+            pass
+
+def file_hash(path: str) -> str:
+    """SHA-256 hex digest of a file's bytes"""
+    with MappedPDF(path) as pdf:
+        return pdf.sha256()
+
+def prefetch(paths: Iterable[str]):
+    """Ask the OS to start reading files into the page cache, without waiting for it
+
+    Uses posix_fadvise(WILLNEED); where that isn't available (Windows, macOS) this does nothing.
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError as e:
+            io_log.debug("No read-ahead for %s: %s", path, e)
+        finally:
+            os.close(fd)
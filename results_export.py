@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Columnar line-item export for Document Matcher batch runs
+One row per compared line item, so reporting can scan millions of rows without loading JSON
+Parquet or Arrow IPC when pyarrow is installed, CSV otherwise
+"""
+
+import csv
+import sys
+from pathlib import Path
+from typing import Optional
+
+from similarity import Status
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # CSV needs nothing beyond the standard library
+    pa = pq = None
+
+LINE_COLUMNS = ['so', 'po', 'pair_match', 'row', 'so_sku', 'po_sku', 'so_description', 'po_description',
+                'so_qty', 'po_qty', 'so_page', 'so_line', 'po_page', 'po_line',
+                'sku_status', 'desc_status', 'qty_status']
+STATUS_COLUMNS = ('sku_status', 'desc_status', 'qty_status')
+STATUS_LABELS = [status.label for status in Status]
+FORMATS = {'.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow', '.csv': 'csv'}
+# Rows buffered before a record batch (and Parquet row group) is written
+CHUNK_ROWS = 65536
+
+def line_schema():
+    """Arrow schema: statuses are dictionary-encoded to one byte per value"""
+    status = pa.dictionary(pa.int8(), pa.string())
+    return pa.schema([
+        ('so', pa.string()), ('po', pa.string()), ('pair_match', pa.bool_()), ('row', pa.int32()),
+        ('so_sku', pa.string()), ('po_sku', pa.string()),
+        ('so_description', pa.string()), ('po_description', pa.string()),
+        ('so_qty', pa.int32()), ('po_qty', pa.int32()),
+        ('so_page', pa.int32()), ('so_line', pa.int32()), ('po_page', pa.int32()), ('po_line', pa.int32()),
+        ('sku_status', status), ('desc_status', status), ('qty_status', status),
+    ])
+
+class LineResultsWriter:
+    """Streams the line_items of compare_pair results to a columnar file
+
+    The format comes from the file extension (.parquet, .arrow/.feather/.ipc or .csv).
+    Without pyarrow a Parquet or Arrow request is written as CSV next to it instead;
+    path is updated to the file actually written. Pairs that errored add no rows.
+    """
+
+    def __init__(self, path: str, fmt: Optional[str] = None):
+        self.format = fmt or FORMATS.get(Path(path).suffix.lower(), 'csv')
+        if self.format != 'csv' and pa is None:
+            path = str(Path(path).with_suffix('.csv'))
+            print(f"pyarrow is not installed; writing line results as CSV to {path}", file=sys.stderr)
+            self.format = 'csv'
+        self.path = path
+        self.rows = 0
+        self._columns = {name: [] for name in LINE_COLUMNS}
+        self._buffered = 0
+        if self.format == 'csv':
+            self._file = open(path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(LINE_COLUMNS)
+        else:
+            self._schema = line_schema()
+            self._statuses = pa.array(STATUS_LABELS, pa.string())
+            if self.format == 'parquet':
+                self._writer = pq.ParquetWriter(path, self._schema, compression='zstd')
+            else:
+                self._writer = pa.ipc.new_file(path, self._schema)
+
+    def write(self, result: dict):
+        """Add the rows of one compare_pair result"""
+        if self.format == 'csv':
+            for n, line in enumerate(result['line_items']):
+                so, po = line['so'], line['po']
+                self._writer.writerow([result['so'], result['po'], result['match'], n,
+                                       so['sku'], po['sku'], so['description'], po['description'],
+                                       so['qty'], po['qty'], so['page'], so['line'], po['page'], po['line'],
+                                       line['sku_status'], line['desc_status'], line['qty_status']])
+            self.rows += len(result['line_items'])
+            return
+        columns = self._columns
+        for n, line in enumerate(result['line_items']):
+            so, po = line['so'], line['po']
+            columns['so'].append(result['so'])
+            columns['po'].append(result['po'])
+            columns['pair_match'].append(result['match'])
+            columns['row'].append(n)
+            columns['so_sku'].append(so['sku'])
+            columns['po_sku'].append(po['sku'])
+            columns['so_description'].append(so['description'])
+            columns['po_description'].append(po['description'])
+            columns['so_qty'].append(so['qty'])
+            columns['po_qty'].append(po['qty'])
+            columns['so_page'].append(so['page'])
+            columns['so_line'].append(so['line'])
+            columns['po_page'].append(po['page'])
+            columns['po_line'].append(po['line'])
+            for name in STATUS_COLUMNS:
+                columns[name].append(Status[line[name].upper()].value)
+        self._buffered += len(result['line_items'])
+        self.rows += len(result['line_items'])
+        if self._buffered >= CHUNK_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffered:
+            return
+        arrays = []
+        for name, values in self._columns.items():
+            if name in STATUS_COLUMNS:
+                arrays.append(pa.DictionaryArray.from_arrays(pa.array(values, pa.int8()), self._statuses))
+            else:
+                arrays.append(pa.array(values, self._schema.field(name).type))
+        self._writer.write_batch(pa.record_batch(arrays, schema=self._schema))
+        self._columns = {name: [] for name in LINE_COLUMNS}
+        self._buffered = 0
+
+    def close(self):
+        if self.format == 'csv':
+            self._file.close()
+        else:
+            self._flush()
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+String similarity for the Document Matcher
+Normalized Indel similarity (the measure behind rapidfuzz's fuzz.ratio), with early exit and memoization
+"""
+
+import math
+from enum import IntEnum
+from functools import lru_cache
+from typing import Dict, Optional
+
+_indel = False  # not looked for yet; None once found missing
+
+DEFAULT_THRESHOLD = 0.85
+# Similarity above which a non-identical value is Status.YELLOW (close) rather than RED
+FIELD_THRESHOLDS = {
+    'name': DEFAULT_THRESHOLD,
+    'address': DEFAULT_THRESHOLD,
+    'city': DEFAULT_THRESHOLD,
+    'state': DEFAULT_THRESHOLD,
+    'zip_code': DEFAULT_THRESHOLD,
+    'sku': DEFAULT_THRESHOLD,
+    'description': DEFAULT_THRESHOLD,
+}
+
+def indel():
+    """rapidfuzz's Indel, imported on the first score rather than at startup; None when not installed"""
+    global _indel
+    if _indel is False:
+        try:
+            from rapidfuzz.distance import Indel
+        except ImportError:  # bit-parallel pure-Python fallback below gives the same scores
+            Indel = None
+        _indel = Indel
+    return _indel
+
+class Status(IntEnum):
+    """Outcome of comparing one value; ordered so max() gives the worst of several"""
+    GREEN = 0   # identical
+    YELLOW = 1  # close: similar above the field's threshold
+    RED = 2     # different
+
+    @property
+    def label(self) -> str:
+        """'green' / 'yellow' / 'red', as written to JSON and CSV results"""
+        return self.name.lower()
+
+def _lcs_length(a: str, b: str, needed: int = 0) -> int:
+    """Longest common subsequence length, bit-parallel over a (one big-int step per char of b)
+
+    Returns -1 as soon as the LCS can no longer reach needed.
+    """
+    n = len(a)
+    masks = {}
+    for i, ch in enumerate(a):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    full = (1 << n) - 1
+    v = full
+    remaining = len(b)
+    for ch in b:
+        u = v & masks.get(ch, 0)
+        v = ((v + u) | (v - u)) & full
+        remaining -= 1
+        # Zero bits in v are matched positions; each char left can add at most one more
+        if needed and n - v.bit_count() + remaining < needed:
+            return -1
+    return n - v.bit_count()
+
+@lru_cache(maxsize=65536)
+def _ratio(a: str, b: str, cutoff: float) -> float:
+    total = len(a) + len(b)
+    if total == 0:
+        return 1.0
+    # Even a full match of the shorter string can't reach the cutoff
+    if 2 * min(len(a), len(b)) / total < cutoff:
+        return 0.0
+    Indel = _indel if _indel is not False else indel()
+    if Indel is not None:
+        return Indel.normalized_similarity(a, b, score_cutoff=cutoff)
+    if len(a) < len(b):
+        a, b = b, a
+    # Tolerance keeps float noise (e.g. 17.000000000000004) from demanding one match too many
+    needed = math.ceil(cutoff * total / 2 - 1e-9) if cutoff else 0
+    lcs = _lcs_length(a, b, needed)
+    if lcs < 0:
+        return 0.0
+    score = 2 * lcs / total
+    return score if score >= cutoff else 0.0
+
+def ratio(a: str, b: str, score_cutoff: float = 0.0) -> float:
+    """Similarity in [0, 1]: 2 * LCS / (len(a) + len(b)); 0.0 when below score_cutoff
+
+    Results are memoized, so repeated pairs (the same SKU or description on many
+    orders) are only scored once.
+    """
+    return _ratio(a, b, score_cutoff)
+
+def status(a: str, b: str, threshold: float = DEFAULT_THRESHOLD) -> Status:
+    """GREEN for identical values, YELLOW when case-insensitive similarity is above threshold, else RED"""
+    if a == b:
+        return Status.GREEN
+    if a and b and ratio(a.lower(), b.lower(), threshold) > threshold:
+        return Status.YELLOW
+    return Status.RED
+
+def field_thresholds(overrides: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """FIELD_THRESHOLDS with any per-field overrides applied"""
+    thresholds = dict(FIELD_THRESHOLDS)
+    if overrides:
+        unknown = set(overrides) - set(thresholds)
+        if unknown:
+            raise ValueError(f"Unknown similarity field(s): {', '.join(sorted(unknown))}")
+        thresholds.update(overrides)
+    return thresholds
+
+def clear_cache():
+    """Forget memoized scores"""
+    _ratio.cache_clear()
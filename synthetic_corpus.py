@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Synthetic SO/PO corpus for the Document Matcher
+Writes PDF pairs (and the text PyPDF2 extracts from them) in the layouts the parser reads, with known injected mismatches
+Run: python synthetic_corpus.py Corpus --pairs 40 --items 1-1000 --mismatch-rate 0.3
+"""
+
+import argparse
+import csv
+import json
+import random
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+# Lines per page; a two-line item row is never split across pages
+LINES_PER_PAGE = 48
+
+# Words here must stay clear of the parser's section keywords (Total, Notes, Item, Number, ...)
+CUSTOMERS = [
+    ("Kerwyn Tokeshi", "123 Main Street", "HONOLULU", "HI", "96813"),
+    ("Chaz Lemon", "88 Harbor Road", "SAN DIEGO", "CA", "92101"),
+    ("Dana Whitfield", "4100 Ridge Avenue", "DENVER", "CO", "80202"),
+    ("Marisol Vega", "19 Elm Court", "AUSTIN", "TX", "78701"),
+    ("Priya Raman", "702 Lake Shore Drive", "CHICAGO", "IL", "60611"),
+    ("Owen Gallagher", "55 Commerce Way", "BOSTON", "MA", "02110"),
+]
+PRODUCTS = [
+    "Custom - Storm Training Group Lightweight Shorts",
+    "Custom - Team Performance Polo",
+    "Custom - Fleece Quarter Zip Pullover",
+    "Custom - Embroidered Logo Hoodie",
+    "Custom - Youth Practice Jersey",
+    "Custom - Moisture Wicking Tee",
+]
+COLORS = ["Black", "Navy", "Heather Grey", "Red", "Royal Blue", "White"]
+SIZES = ["XS", "S", "M", "L", "XL", "2XL"]
+MISMATCH_KINDS = ('qty', 'sku', 'description', 'missing', 'extra', 'ship_to')
+
+@dataclass
+class Item:
+    sku: str
+    description: str
+    qty: int
+    price: float
+
+@dataclass
+class Order:
+    """One SO and its PO; the PO carries any injected mismatches"""
+    so_number: str
+    po_number: str
+    ship_to: Tuple[str, str, str, str, str]
+    so_items: List[Item]
+    po_items: List[Item]
+    po_ship_to: Tuple[str, str, str, str, str] = None
+    fax_layout: bool = False          # PO names the customer on a 'Fax:' line instead of a Ship To block
+    injected: List[str] = field(default_factory=list)
+
+def make_order(rng: random.Random, n_items: int, mismatches: Sequence[str] = (),
+               fax_layout: bool = False) -> Order:
+    """Build an order of n_items line items, applying each named mismatch kind to the PO once"""
+    so_number = f"L{rng.randint(0, 999999):06d}"
+    po_number = f"KS{rng.randint(0, 9999999):07d}AIR"
+    ship_to = rng.choice(CUSTOMERS)
+    items = []
+    styles = rng.sample(range(300000, 399999), max(1, (n_items + len(SIZES) - 1) // len(SIZES)))
+    for n in range(n_items):
+        style = styles[n // len(SIZES)]
+        size = SIZES[n % len(SIZES)]
+        product = PRODUCTS[style % len(PRODUCTS)]
+        color = COLORS[style % len(COLORS)]
+        items.append(Item(f"{style}-{size}", f"{product} {color}", rng.randint(1, 48),
+                          round(rng.uniform(8, 60), 2)))
+    order = Order(so_number, po_number, ship_to, items, [replace(item) for item in items],
+                  po_ship_to=ship_to, fax_layout=fax_layout)
+    for kind in mismatches:
+        inject(rng, order, kind)
+    return order
+
+def inject(rng: random.Random, order: Order, kind: str):
+    """Apply one mismatch to the PO side and record it"""
+    po = order.po_items
+    if kind == 'ship_to':
+        name, address, city, state, zip_code = order.po_ship_to
+        order.po_ship_to = (name, address, city, state, zip_code[:-1] + str((int(zip_code[-1]) + 1) % 10))
+    elif kind == 'extra' or not po:
+        po.append(Item(f"{rng.randint(400000, 499999)}-M", f"{rng.choice(PRODUCTS)} Black",
+                       rng.randint(1, 12), 20.0))
+        kind = 'extra'
+    else:
+        k = rng.randrange(len(po))
+        if kind == 'qty':
+            po[k].qty += 1
+        elif kind == 'sku':
+            # A typo in the style number: swap its last two digits (or bump one if they match)
+            style, size = po[k].sku.split('-', 1)
+            digits = style[:-2] + style[-1] + style[-2] if style[-1] != style[-2] else style[:-1] + str((int(style[-1]) + 1) % 10)
+            po[k].sku = f"{digits}-{size}"
+        elif kind == 'description':
+            color = next(c for c in COLORS if not po[k].description.endswith(c))
+            po[k].description = po[k].description.rsplit(' ', 1)[0] + ' ' + color
+        elif kind == 'missing':
+            del po[k]
+        else:
+            raise ValueError(f"Unknown mismatch kind '{kind}' (expected one of {', '.join(MISMATCH_KINDS)})")
+    order.injected.append(kind)
+
+def _ship_to_block(ship_to: Tuple[str, str, str, str, str]) -> List[str]:
+    name, address, city, state, zip_code = ship_to
+    return ["Ship To:", name, address, f"{city}, {state} {zip_code}", ""]
+
+def _paginate(header: List[str], rows: List[List[str]], footer: List[str], furniture: Optional[List[str]]) -> List[List[str]]:
+    """Lay lines out on pages, keeping each item row's lines together
+
+    With furniture, every page after the first repeats those lines (a running table header)
+    and every page ends with a 'Page n of m' line, as real multi-page exports do.
+    """
+    pages = [list(header)]
+    for row in rows:
+        if len(pages[-1]) + len(row) > LINES_PER_PAGE:
+            pages.append(list(furniture or []))
+        pages[-1].extend(row)
+    pages[-1].extend(footer)
+    if furniture is not None:
+        for n, page in enumerate(pages, 1):
+            page.append(f"Page {n} of {len(pages)}")
+    return pages
+
+def so_pages(order: Order, furniture: bool = False) -> List[List[str]]:
+    """Sales Order: multi-line 'Item / Type Number Description Unit Price Qty / Ordered Amount' header and Drop Ship rows"""
+    table_header = ["Item", "Type Number Description Unit Price Qty", "Ordered Amount"]
+    header = [f"Sales Order {order.so_number}", "Date 10/14/2026", ""] + _ship_to_block(order.ship_to) + table_header
+    rows = []
+    subtotal = 0.0
+    for n, item in enumerate(order.so_items, 1):
+        amount = item.qty * item.price
+        subtotal += amount
+        rows.append([f"{n} Drop Ship {item.sku} {item.description} {item.sku}${item.price:.2f}",
+                     f"{item.qty}ea $ {amount:,.2f}"])
+    footer = [f"Subtotal ${subtotal:,.2f}", f"Total ${subtotal:,.2f}"]
+    return _paginate(header, rows, footer, table_header if furniture else None)
+
+def po_pages(order: Order, furniture: bool = False) -> List[List[str]]:
+    """Purchase Order: single-line 'Item # Number Description Qty Unit Cost Total Cost' header, two lines per item"""
+    table_header = ["Item # Number Description Qty Unit Cost Total Cost"]
+    header = [f"Purchase Order {order.po_number}", f"Reference SO {order.so_number}", ""]
+    if order.fax_layout:
+        name, address, city, state, zip_code = order.po_ship_to
+        header += ["Phone: 808-555-0100 Fax: " + name, address, f"{city}, {state} {zip_code}", ""]
+    else:
+        header += _ship_to_block(order.po_ship_to)
+    header += table_header
+    rows = []
+    total = 0.0
+    for n, item in enumerate(order.po_items, 1):
+        cost = round(item.price / 2, 2)
+        total += item.qty * cost
+        rows.append([f"{n} {item.sku} {item.description}",
+                     f"{item.sku}{item.qty} ea ${cost:.2f} ${item.qty * cost:,.2f}"])
+    footer = [f"Total ${total:,.2f}"]
+    return _paginate(header, rows, footer, table_header if furniture else None)
+
+def pages_text(pages: List[List[str]]) -> str:
+    """The text PDFExtractor.extract_text returns for these pages"""
+    return "\f".join("\n".join(page) + "\n" for page in pages)
+
+def _pdf_string(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def write_pdf(path: str, pages: List[List[str]]):
+    """Write a minimal text-only PDF (Helvetica, one text line per line) with no extra dependencies"""
+    objects = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    pages_id = 2 * len(pages) + 2
+    page_ids = []
+    for lines in pages:
+        ops = ["BT /F1 9 Tf 11 TL 36 770 Td"] + [f"({_pdf_string(line)}) Tj T*" for line in lines] + ["ET"]
+        stream = "\n".join(ops).encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Contents %d 0 R"
+                       b" /Resources << /Font << /F1 1 0 R >> >> >>" % (pages_id, len(objects)))
+        page_ids.append(len(objects))
+    objects.append(b"<< /Type /Pages /Kids [%s] /Count %d >>"
+                   % (b" ".join(b"%d 0 R" % i for i in page_ids), len(page_ids)))
+    objects.append(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, len(objects), xref)
+    Path(path).write_bytes(bytes(out))
+
+def generate(folder: str, pairs: int, items: Tuple[int, int] = (1, 1000), mismatch_rate: float = 0.3,
+             seed: int = 0, furniture: bool = False, pdf: bool = True) -> List[dict]:
+    """Write pairs of SO/PO documents, a manifest.csv and expected.jsonl; returns the expected records
+
+    Item counts are drawn log-uniformly from the items range so small and large orders both
+    appear. A pair gets one or two injected mismatches with probability mismatch_rate.
+    """
+    rng = random.Random(seed)
+    out = Path(folder)
+    out.mkdir(parents=True, exist_ok=True)
+    low, high = items
+    expected = []
+    for _ in range(pairs):
+        n_items = int(round(low * (high / low) ** rng.random())) if low > 0 else rng.randint(low, high)
+        kinds = rng.sample(MISMATCH_KINDS, rng.randint(1, 2)) if rng.random() < mismatch_rate else []
+        order = make_order(rng, n_items, kinds, fax_layout=rng.random() < 0.5)
+        customer = order.ship_to[0]
+        stems = (f"SO-{order.so_number}-{customer}", f"PO-{order.po_number}-{customer}")
+        for stem, pages in zip(stems, (so_pages(order, furniture), po_pages(order, furniture))):
+            if pdf:
+                write_pdf(str(out / f"{stem}.pdf"), pages)
+            else:
+                (out / f"{stem}.txt").write_text(pages_text(pages), encoding='utf-8')
+        suffix = '.pdf' if pdf else '.txt'
+        expected.append({'so': stems[0] + suffix, 'po': stems[1] + suffix, 'items': n_items,
+                         'injected': order.injected, 'match': not order.injected})
+    with open(out / "manifest.csv", 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['so', 'po'])
+        writer.writerows((record['so'], record['po']) for record in expected)
+    with open(out / "expected.jsonl", 'w', encoding='utf-8') as f:
+        for record in expected:
+            f.write(json.dumps(record) + '\n')
+    return expected
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic SO/PO corpus with known mismatches')
+    parser.add_argument('folder', help='Output folder (gets SO-*/PO-* files, manifest.csv and expected.jsonl)')
+    parser.add_argument('--pairs', type=int, default=20)
+    parser.add_argument('--items', default='1-1000', help="Line items per order, 'N' or 'MIN-MAX'")
+    parser.add_argument('--mismatch-rate', type=float, default=0.3, help='Share of pairs with injected mismatches')
+    parser.add_argument('--furniture', action='store_true', help='Repeat table headers and add page footers on every page')
+    parser.add_argument('--text', action='store_true', help='Write extracted-text .txt files instead of PDFs')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    low, _, high = args.items.partition('-')
+    expected = generate(args.folder, args.pairs, (int(low), int(high or low)), args.mismatch_rate,
+                        args.seed, args.furniture, not args.text)
+    mismatched = sum(1 for record in expected if record['injected'])
+    print(f"Wrote {len(expected)} pairs to {args.folder} ({mismatched} with injected mismatches)")
+
+if __name__ == "__main__":
+    main()